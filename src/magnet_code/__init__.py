@@ -132,6 +132,8 @@ class CLI:
             # If we get an error, display it accordingly
             elif event.type == AgentEventType.AGENT_ERROR:
                 error = event.data.get("error", "Unknown error")
+                # Print the part of the response streamed before the error first
+                self.tui.flush_assistant_delta()
                 console.print(f"\n[error]Error: {error}[/error]")
             # If we have a tool call start, this means the agent wants to call a tool and we want
             # to display progress information with the tool name and the desired parameters. This
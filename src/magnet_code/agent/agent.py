@@ -222,6 +222,12 @@ class Agent:
 
     async def __aexit__(self, exc_type, exc_value, traceback) -> None:
         """Python helper function to close a context handler used by `with` statements"""
+        if self.session and self.session.hook_system:
+            await self.session.hook_system.aclose()
+
+        if self.session and self.session.tool_registry:
+            await self.session.tool_registry.aclose()
+
         if self.session and self.session.client:
             await self.session.client.close()
             self.session = None
@@ -1,5 +1,4 @@
 import datetime
-import json
 from typing import Any
 import uuid
 from magnet_code.client.llm_client import LLMClient
@@ -10,6 +9,7 @@ from magnet_code.context.compaction import ChatCompactor
 from magnet_code.context.manager import ContextManager
 from magnet_code.hooks.hook_system import HookSystem
 from magnet_code.safety.approval import ApprovalManager
+from magnet_code.tools.builtin.memory import parse_memory
 from magnet_code.tools.builtin.registry import create_default_registry
 from magnet_code.tools.discovery import ToolDiscoveryManager
 from magnet_code.tools.mcp.manager import MCPManager
@@ -47,7 +47,7 @@ class Session:
     async def initialize(self) -> None:
         await self.mcp_manager.initialize()
         self.mcp_manager.register_tools(self.tool_registry)
-        self.discovery_manager.discover_all()
+        await self.discovery_manager.discover_all()
 
         self.context_manager =  ContextManager(
             config=self.config,
@@ -65,9 +65,7 @@ class Session:
             return None
 
         try:
-            content = path.read_text(encoding="utf-8")
-            data = json.loads(content)
-            entries = data.get("entries")
+            entries = parse_memory(path.read_bytes())
             if not entries:
                 return None
             lines = ["User preferencec and notes:"]
@@ -4,7 +4,6 @@ from openai import APIConnectionError, APIError, AsyncOpenAI, RateLimitError
 
 import os
 
-import tiktoken
 
 from magnet_code.client.response import (
     StreamEventType,
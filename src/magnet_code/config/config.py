@@ -1,10 +1,12 @@
 from __future__ import annotations
 from enum import Enum
 import fnmatch
+import functools
 import os
+import re
 from pathlib import Path
 from typing import Any
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class ModelConfig(BaseModel):
@@ -13,6 +15,27 @@ class ModelConfig(BaseModel):
     context_window: int = 400_000
 
 
+@functools.lru_cache(maxsize=16)
+def _compile_exclude_patterns(patterns: tuple[str, ...]) -> re.Pattern[str] | None:
+    """Translate the environment variable exclude globs to a single regex matching any of them,
+    once, instead of on every environment build. The patterns are matched case insensitively,
+    against uppercased names."""
+    if not patterns:
+        return None
+
+    return re.compile(
+        "|".join(f"(?:{fnmatch.translate(pattern.upper())})" for pattern in patterns)
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_excluded(patterns: tuple[str, ...], name: str) -> bool:
+    """Whether the environment variable `name` is excluded by `patterns`. The names in the
+    environment barely change during a session, so each of them is matched only once."""
+    regex = _compile_exclude_patterns(patterns)
+    return bool(regex and regex.match(name.upper()))
+
+
 class ShellEnvironmentPolicy(BaseModel):
     ignore_default_excludes: bool = False
     exclude_patterns: list[str] = Field(
@@ -22,16 +45,14 @@ class ShellEnvironmentPolicy(BaseModel):
     set_vars: dict[str, str] = Field(default_factory=dict)
 
     def _build_environment(self) -> dict[str, str]:
-        env = os.environ.copy()
+        if self.ignore_default_excludes:
+            env = os.environ.copy()
+        else:
+            patterns = tuple(self.exclude_patterns)
 
-        if not self.ignore_default_excludes:
-            for pattern in self.exclude_patterns:
-                # Match and compile a list of all the environment variables against the pattern
-                keys_to_remove = [
-                    k for k in env.keys() if fnmatch.fnmatch(k.upper(), pattern.upper())
-                ]
-                for k in keys_to_remove:
-                    del env[k]
+            # Build the filtered environment in a single pass, instead of copying the whole
+            # environment and deleting the excluded variables from the copy
+            env = {k: v for k, v in os.environ.items() if not _is_excluded(patterns, k)}
 
         # Check if we need to update any override keys
         if self.set_vars:
@@ -88,12 +109,18 @@ class HookTrigger(str, Enum):
     ON_ERROR = 'on_error'
 
 class HookConfig(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     name: str
     trigger: HookTrigger
     command: str | None = None
     script: str | None = None # .sh shell script
     timeout_sec: float = 30
     enabled: bool = True
+    # Run the hook in the background instead of waiting for it to finish (`async = true` in toml)
+    async_: bool = Field(default=False, alias="async")
+    # Run the script in its own bash process instead of the shared one kept alive for script hooks
+    isolated: bool = False
 
     @model_validator(mode='after')
     def validate_hook(self) -> HookConfig:
@@ -111,6 +138,14 @@ class Config(BaseModel):
     )
     hooks_enabled: bool = False
     hooks: list[HookConfig] = Field(default_factory=list)
+    # Run the hooks of a trigger one after another, in the order they are configured
+    hooks_sequential: bool = False
+    # Maximum number of async hooks running at the same time
+    hooks_async_pool_size: int = Field(default=4, ge=1)
+    # How long to wait for running async hooks when shutting down
+    hooks_async_shutdown_grace_seconds: float = Field(default=5, ge=0)
+    # Run the hooks on worker threads, each with its own event loop, instead of on the agent loop
+    hooks_isolate_event_loop: bool = False
     approval: ApprovalPolicy = ApprovalPolicy.ON_REQUEST
     max_turns: int = 100
     mcp_servers: dict[str, MCPServerConfig] = Field(default_factory=dict)
@@ -12,6 +12,10 @@ logger = logging.getLogger(__name__)
 CONFIG_FILE_NAME = "config.toml"
 AGENT_MD_FILE = "agent.md"
 
+# Caches the content of `agent.md` files keyed by path, along with the file modification time
+# at which it was read, such that we only re-read the file when it changes.
+_AGENT_MD_CACHE: dict[Path, tuple[int, str]] = {}
+
 def get_config_dir() -> Path:
     return Path(user_config_dir())
 
@@ -44,14 +48,20 @@ def _get_project_config(cwd: Path) -> Path | None:
         
     return None
 
-def _get_agent_md_files(cwd: Path) -> Path | None:
+def _get_agent_md_files(cwd: Path) -> str | None:
     """Reads any `AGENTS.md` file present in the current working directory"""
     current = cwd.resolve()
     
     if current.is_dir():
         agent_md_file = current / AGENT_MD_FILE
         if agent_md_file.is_file():
+            mtime_ns = agent_md_file.stat().st_mtime_ns
+            cached = _AGENT_MD_CACHE.get(agent_md_file)
+            if cached and cached[0] == mtime_ns:
+                return cached[1]
+
             content = agent_md_file.read_text(encoding='utf-8')
+            _AGENT_MD_CACHE[agent_md_file] = (mtime_ns, content)
             return content
         
     return None
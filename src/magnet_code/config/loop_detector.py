@@ -1,4 +1,3 @@
-from collections import deque
 from typing import Any
 
 
@@ -7,8 +6,10 @@ class LoopDetector:
         # Catch the number of times an agent action repeats
         self.max_exact_repeats = 3
         self.max_cycle_length = 3 # A->B->A->B
-        # Keep the latest actions
-        self._history: deque[str] = deque(maxlen=20)
+        # Keep the latest actions. A plain list (trimmed manually) is used instead of a bounded
+        # deque, because deques do not support the slicing `check_for_loop` relies on.
+        self._max_history = 20
+        self._history: list[str] = []
 
     def record_action(self, action_type: str, **details: Any):
         """Records an agent action"""
@@ -29,15 +30,21 @@ class LoopDetector:
         signature = "|".join(output)
         self._history.append(signature)
 
+        if len(self._history) > self._max_history:
+            del self._history[:-self._max_history]
+
     def check_for_loop(self) -> str | None:
         if len(self._history) < 2:
             return None
 
-        # First we check if a single element is repeating
+        # First we check if a single element is repeating, comparing the tail in place instead
+        # of copying it out
         if len(self._history) >= self.max_exact_repeats:
-            recent = list(self._history)[-self.max_exact_repeats:]
+            last = self._history[-1]
 
-            if len(set(recent)) == 1:
+            if all(
+                self._history[-i] == last for i in range(2, self.max_exact_repeats + 1)
+            ):
                 return f"Same action repeated {self.max_exact_repeats} times"
 
         # Check if there is a cycle
@@ -9,7 +9,7 @@ from magnet_code.tools.base import Tool
 from magnet_code.utils.text import count_tokens
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageItem:
     role: str
     content: str
@@ -38,14 +38,24 @@ class ContextManager:
     PRUNE_PROTECT_TOKENS = 40_000
     # If we can free at least this amount of tokens, we prune
     PRUNE_MINIMUM_TOKENS = 20_000
+    # Content that replaces a pruned tool output
+    PRUNE_PLACEHOLDER = '[Old tool result content cleared]'
     
     def __init__(self, config: Config, user_memory: str | None, tools: list[Tool] | None) -> None:
         self.config = config
         self._model_name = config.model_name
+        # Compress once the latest usage goes above 80% of the model context window
+        self._compression_threshold = int(config.model.context_window * 0.8)
         self._system_prompt = get_system_prompt(self.config, user_memory, tools)
+        # The system prompt does not change during the session, so its message is built only once
+        self._system_message: dict[str, Any] | None = (
+            {"role": "system", "content": self._system_prompt} if self._system_prompt else None
+        )
         self._messages: list[MessageItem] = []
         self._latest_usage = TokenUsage()
         self._total_usage = TokenUsage()
+        # Token count of `PRUNE_PLACEHOLDER` for this model, computed on the first prune
+        self._placeholder_tokens: int | None = None
 
     @property
     def message_count(self) -> int:
@@ -88,27 +98,13 @@ class ContextManager:
     def get_messages(self) -> list[dict[str, Any]]:
         """Convert the message into the OpenAI format, which is a list of dicitionaries where each
         dictionary has a `role` and a `content` key"""
-        messages = []
-        if self._system_prompt:
-            messages.append(
-                {
-                    "role": "system",
-                    "content": self._system_prompt,
-                }
-            )
-
-        for item in self._messages:
-            messages.append(item.to_dict())
+        messages = [self._system_message] if self._system_message else []
+        messages.extend([item.to_dict() for item in self._messages])
 
         return messages
 
     def needs_compression(self) -> bool:
-        context_limit = self.config.model.context_window
-        current_token = self._latest_usage.total_tokens
-
-        print(context_limit)
-        print(current_token)
-        return current_token > context_limit * 0.8
+        return self._latest_usage.total_tokens > self._compression_threshold
 
 
     def set_latest_usage(self, usage: TokenUsage):
@@ -207,10 +203,16 @@ I'll continue with the REMAINING tasks only, starting from where we left off."""
         # number of messages we pruned
         pruned_count = 0
 
+        # All the messages pruned in this pass share the same timestamp
+        now = datetime.now()
+
+        if self._placeholder_tokens is None:
+            self._placeholder_tokens = count_tokens(self.PRUNE_PLACEHOLDER, self._model_name)
+
         for msg in to_prune:
-            msg.content = '[Old tool result content cleared]'
-            msg.token_count = count_tokens(msg.content, self._model_name)
-            msg.pruned_at = datetime.now()
+            msg.content = self.PRUNE_PLACEHOLDER
+            msg.token_count = self._placeholder_tokens
+            msg.pruned_at = now
             pruned_count += 1
 
         return pruned_count
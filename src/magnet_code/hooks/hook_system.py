@@ -1,10 +1,13 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import json
+import logging
 import os
-import signal
+import secrets
+import shlex
+import math
 import sys
-import tempfile
-from typing import Any
+from typing import Any, Coroutine
 from magnet_code.config.config import (
     Config,
     HookConfig,
@@ -12,6 +15,16 @@ from magnet_code.config.config import (
     ShellEnvironmentPolicy,
 )
 from magnet_code.tools.base import ToolResult
+from magnet_code.utils.process import (
+    kill_process_group,
+    new_process_group_kwargs,
+    wait_process,
+)
+
+logger = logging.getLogger(__name__)
+
+# Hook variables which only depend on the trigger and are pre-encoded with the base environment
+_STATIC_ENV_KEYS = frozenset({'MAGNET_TRIGGER', 'MAGNET_CWD'})
 
 
 class HookSystem:
@@ -22,51 +35,216 @@ class HookSystem:
         if self.config.hooks_enabled:
             self.hooks = [hook for hook in self.config.hooks if hook.enabled]
 
+        # Index the hooks by their trigger such that firing a trigger does not scan all the hooks
+        self._by_trigger: dict[HookTrigger, tuple[HookConfig, ...]] = {
+            trigger: tuple(hook for hook in self.hooks if hook.trigger == trigger)
+            for trigger in HookTrigger
+        }
+
+        # Async hooks are run in the background, bounded by the pool size, and we keep a reference
+        # to their tasks such that they are not garbage collected before finishing
+        self._async_semaphore = asyncio.Semaphore(self.config.hooks_async_pool_size)
+        self._bg_tasks: set[asyncio.Task] = set()
+
+        # The hook environment policy is static, so the base environment is built only once and
+        # each trigger overlays its own `MAGNET_*` variables on a copy of it
+        self._base_env = ShellEnvironmentPolicy(ignore_default_excludes=True)._build_environment()
+
+        # The child process environment is passed to the OS as bytes, so on POSIX we encode the
+        # base environment and the static variables of each trigger once, such that only the
+        # variables that change between runs are encoded when a hook fires
+        base_env_bytes = {
+            os.fsencode(key): os.fsencode(value) for key, value in self._base_env.items()
+        }
+        cwd = os.fsencode(str(self.config.cwd))
+        self._static_env_bytes: dict[str, dict[bytes, bytes]] = {
+            trigger.value: {
+                **base_env_bytes,
+                b"MAGNET_TRIGGER": os.fsencode(trigger.value),
+                b"MAGNET_CWD": cwd,
+            }
+            for trigger in HookTrigger
+        }
+
+        # Long-lived bash process shared by the script hooks, spawned on first use, such that we
+        # do not pay for a new bash process each time a script hook fires. Scripts are sent to it
+        # one at a time.
+        self._shell: asyncio.subprocess.Process | None = None
+        self._shell_lock = asyncio.Lock()
+
+        # When isolating the event loop, hooks run on worker threads, each on a fresh event loop,
+        # such that they cannot conflict with the loop the agent is running on
+        self._pool: ThreadPoolExecutor | None = None
+        if self.config.hooks_isolate_event_loop:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.config.hooks_async_pool_size,
+                thread_name_prefix="magnet-hook",
+            )
+
     async def _run_hook(self, hook: HookConfig, env: dict[str, str]) -> None:
-        print(hook.command)
+        if hook.async_:
+            self._spawn(self._run_hook_in_pool(hook, env))
+            return
+
+        await self._execute_hook(hook, env)
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Run `coro` in the background, keeping a reference to it such that it is not garbage
+        collected and is waited for by `aclose`"""
+        task = asyncio.create_task(coro)
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+
+    async def _run_hook_in_pool(self, hook: HookConfig, env: dict[str, str]) -> None:
+        async with self._async_semaphore:
+            await self._execute_hook(hook, env)
+
+    async def _execute_hook(self, hook: HookConfig, env: dict[str, str]) -> None:
+        logger.debug("Running hook %s: %s", hook.name, hook.command or "<script>")
+        timeout = hook.timeout_sec
+
+        # Let the hook know how much time it has, such that it can adjust its own timeouts. The
+        # value is rounded up, such that a timeout under a second is not exported as 0
+        env = {**env, 'MAGNET_TIMEOUT_REMAINING': str(math.ceil(timeout))}
+
         if hook.command:
-            await self._run_command(hook.command, hook.timeout_sec, env)
+            run = self._run_command(hook.command, timeout, env)
+        elif hook.isolated or self._pool:
+            # running a .sh script in its own bash process, which we feed the script through its
+            # standard input instead of writing it to a temporary file first. The shared shell is
+            # bound to the agent's event loop, so isolated event loops cannot use it either.
+            run = self._run_command(None, timeout, env, script=hook.script)
         else:
-            # running a .sh script
-            with tempfile.NamedTemporaryFile(mode="w", suffix=".sh") as f:
-                f.write("#!/bin/bash\n")
-                f.write(hook.script)
-                script_path = f.name
-            try:
-                os.chmod(script_path, 0o755)
-                await self._run_command(script_path, hook.timeout_sec, env)
-            finally:
-                os.unlink(script_path)
+            run = self._run_script(hook.script, timeout, env)
 
-    async def _run_command(self, command: str, timeout: float, env: dict[str, str]) -> None:
-        try:
-            process = await asyncio.create_subprocess_shell(
-                command,
-                # Capture the standard output and error
+        if self._pool:
+            await asyncio.get_running_loop().run_in_executor(self._pool, asyncio.run, run)
+        else:
+            await run
+
+    async def _get_shell(self) -> asyncio.subprocess.Process:
+        """Get the shared bash process used to run script hooks, spawning it if it is not running"""
+        if self._shell is None or self._shell.returncode is not None:
+            self._shell = await asyncio.create_subprocess_exec(
+                "/bin/bash",
+                "--noprofile",
+                "--norc",
+                "-s",
+                stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
                 cwd=self.config.cwd,
-                env=env,
-                # Create a new OS session and process group
-                start_new_session=True,
+                env=self._base_env,
+                **new_process_group_kwargs(),
             )
+
+        return self._shell
+
+    async def _close_shell(self) -> None:
+        """Kill the shared bash process, if any. It will be respawned on the next script hook."""
+        shell, self._shell = self._shell, None
+        if shell is None or shell.returncode is not None:
+            return
+
+        await kill_process_group(shell)
+        await wait_process(shell)
+
+    async def _run_script(self, script: str, timeout: float, env: dict[str, str]) -> None:
+        """Run `script` in a subshell of the shared bash process. The `MAGNET_*` variables of
+        `env` are exported in the subshell only, and the end of the script is signalled by echoing
+        a unique marker together with its exit code."""
+        marker = f"__MAGNET_DONE_{secrets.token_hex(8)}__"
+        exports = "".join(
+            f"export {key}={shlex.quote(value)}\n" for key, value in env.items()
+        )
+        payload = f"(\n{exports}{script}\n) </dev/null >/dev/null 2>&1\necho {marker} $?\n"
+
+        async with self._shell_lock:
+            try:
+                shell = await self._get_shell()
+                shell.stdin.write(payload.encode("utf-8"))
+                # Wait for the payload to be flushed to the shell, such that large scripts do not
+                # pile up in the write buffer
+                await shell.stdin.drain()
+                await asyncio.wait_for(
+                    self._read_until_marker(shell, marker.encode("utf-8")),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                # The script is still running in the shared shell, so the shell has to go
+                await self._close_shell()
+            except Exception:
+                logger.exception("Hook script failed in shared shell")
+                await self._close_shell()
+
+    async def _read_until_marker(self, shell: asyncio.subprocess.Process, marker: bytes) -> None:
+        while True:
+            line = await shell.stdout.readline()
+            if not line:
+                raise EOFError("Hook shell exited unexpectedly")
+            if line.startswith(marker):
+                return
+
+    async def _run_command(
+        self,
+        command: str | None,
+        timeout: float,
+        env: dict[str, str],
+        script: str | None = None,
+    ) -> None:
+        try:
+            if script is not None:
+                process = await asyncio.create_subprocess_exec(
+                    "/bin/bash",
+                    "-s",
+                    stdin=asyncio.subprocess.PIPE,
+                    # Capture the standard output and error
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=self.config.cwd,
+                    env=self._process_env(env),
+                    **new_process_group_kwargs(),
+                )
+            else:
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    # Capture the standard output and error
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=self.config.cwd,
+                    env=self._process_env(env),
+                    **new_process_group_kwargs(),
+                )
             print(process)
 
             try:
                 await asyncio.wait_for(
-                    process.communicate(),
+                    process.communicate(
+                        script.encode("utf-8") if script is not None else None
+                    ),
                     timeout=timeout,
                 )
             except asyncio.TimeoutError:
-                # If we have a timeout error, force kill the shell
-                if sys.platform != "win32":
-                    os.killpg(os.getpgid(process), signal.SIGKILL)
-                else:
-                    process.kill()
-                await process.wait()
+                # If we have a timeout error, kill the shell and its children
+                await kill_process_group(process)
+                await wait_process(process)
         except Exception as e:
             print(e)
 
+    def _process_env(self, env: dict[str, str]) -> dict[str, str] | dict[bytes, bytes]:
+        """Build the environment of a hook process from the base environment and the `MAGNET_*`
+        variables in `env`"""
+        if sys.platform == "win32":
+            # Windows only accepts a str environment
+            return {**self._base_env, **env}
+
+        process_env = dict(self._static_env_bytes[env['MAGNET_TRIGGER']])
+        for key, value in env.items():
+            if key not in _STATIC_ENV_KEYS:
+                process_env[os.fsencode(key)] = os.fsencode(value)
+
+        return process_env
+
     def _build_env(
         self,
         trigger: HookTrigger,
@@ -74,9 +252,11 @@ class HookSystem:
         user_message: str | None = None,
         error: Exception | None = None,
     ) -> dict[str, str]:
-        env = ShellEnvironmentPolicy(ignore_default_excludes=True)._build_environment()
-        env['MAGNET_TRIGGER'] = trigger.value
-        env['MAGNET_CWD'] = str(self.config.cwd)
+        """Build the `MAGNET_*` variables passed to the hooks of `trigger`"""
+        env = {
+            'MAGNET_TRIGGER': trigger.value,
+            'MAGNET_CWD': str(self.config.cwd),
+        }
 
         if tool_name:
             env['MAGNET_TOOL_NAME'] = tool_name
@@ -89,39 +269,90 @@ class HookSystem:
 
         return env
 
+    async def aclose(self) -> None:
+        """Wait for the async hooks still running in the background, up to the configured grace
+        period, and cancel the ones that did not finish in time. Also stops the shared bash
+        process used by script hooks."""
+        if self._bg_tasks:
+            tasks = list(self._bg_tasks)
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*tasks, return_exceptions=True),
+                    timeout=self.config.hooks_async_shutdown_grace_seconds,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        await self._close_shell()
+
+        if self._pool:
+            self._pool.shutdown(wait=False)
+
+    async def _run_hooks(self, trigger: HookTrigger, env: dict[str, str]) -> None:
+        """Run all the hooks for `trigger` concurrently, or in their configured order if hooks are
+        sequential. A failing hook is logged and does not stop the other ones from running."""
+        hooks = self._by_trigger[trigger]
+        if not hooks:
+            return
+
+        if self.config.hooks_sequential:
+            for hook in hooks:
+                await self._run_hook_logged(hook, env)
+            return
+
+        async with asyncio.TaskGroup() as tg:
+            for hook in hooks:
+                tg.create_task(self._run_hook_logged(hook, env))
+
+    async def _run_hook_logged(self, hook: HookConfig, env: dict[str, str]) -> None:
+        # Failures are logged here instead of propagated, such that a failing hook does not
+        # cancel its siblings in the task group
+        try:
+            await self._run_hook(hook, env)
+        except Exception as e:
+            logger.error(f"Hook {hook.name} failed: {e}")
+
     async def trigger_before_agent(self, user_message: str) -> None:
         env = self._build_env(HookTrigger.BEFORE_AGENT, user_message=user_message)
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.BEFORE_AGENT:
-                await self._run_hook(hook, env)
+        await self._run_hooks(HookTrigger.BEFORE_AGENT, env)
 
     async def trigger_after_agent(self, user_message: str, agent_response: str) -> None:
         env = self._build_env(HookTrigger.AFTER_AGENT, user_message=user_message)
-        env['MAGNET_RESPONSE'] = agent_response
+        env['MAGNET_RESPONSE'] = agent_response or ''
 
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.AFTER_AGENT:
-                await self._run_hook(hook, env)
+        await self._run_hooks(HookTrigger.AFTER_AGENT, env)
 
     async def trigger_before_tool(self, tool_name: str, tool_params: dict[str, Any]) -> None:
         env = self._build_env(HookTrigger.BEFORE_TOOL, tool_name=tool_name)
         env['MAGNET_TOOL_PARAMS'] = json.dumps(tool_params)
 
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.BEFORE_TOOL:
-                await self._run_hook(hook, env)
+        await self._run_hooks(HookTrigger.BEFORE_TOOL, env)
 
-    async def trigger_after_tool(self, tool_name: str, tool_params: dict[str, Any], tool_result: ToolResult) -> None:
+    async def trigger_after_tool(
+        self,
+        tool_name: str,
+        tool_params: dict[str, Any],
+        tool_result: ToolResult,
+    ) -> None:
         env = self._build_env(HookTrigger.AFTER_TOOL, tool_name=tool_name)
         env['MAGNET_TOOL_PARAMS'] = json.dumps(tool_params)
         env['MAGNET_TOOL_RESULT'] = tool_result.to_model_output()
 
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.AFTER_TOOL:
-                await self._run_hook(hook, env)
+        await self._run_hooks(HookTrigger.AFTER_TOOL, env)
+
+    def schedule_after_tool(
+        self,
+        tool_name: str,
+        tool_params: dict[str, Any],
+        tool_result: ToolResult,
+    ) -> None:
+        """Same as `trigger_after_tool`, but without waiting for the hooks. Nothing depends on the
+        after tool hooks, so the tool result can be returned while they are still running."""
+        if not self._by_trigger[HookTrigger.AFTER_TOOL]:
+            return
+
+        self._spawn(self.trigger_after_tool(tool_name, tool_params, tool_result))
 
     async def trigger_on_error(self, error: Exception) -> None:
-        env = self._build_env(HookTrigger.ON_ERROR, error)
-        for hook in self.hooks:
-            if hook.trigger == HookTrigger.ON_ERROR:
-                await self._run_hook(hook, env)
\ No newline at end of file
+        env = self._build_env(HookTrigger.ON_ERROR, error=error)
+        await self._run_hooks(HookTrigger.ON_ERROR, env)
\ No newline at end of file
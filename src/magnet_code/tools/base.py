@@ -1,8 +1,9 @@
 from __future__ import annotations
 import abc
 from dataclasses import dataclass, field
+import functools
 from pathlib import Path
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from pydantic.json_schema import model_json_schema
 from enum import Enum
 from typing import Any
@@ -23,13 +24,16 @@ class ToolKind(str, Enum):
     MCP = "mcp"
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolInvocation:
     parameters: dict[str, Any]
     cwd: Path
+    # Parameters parsed into the tool schema model, kept such that the confirmation and the
+    # execution of the same invocation only validate them once
+    validated_params: Any = None
 
 
-@dataclass
+@dataclass(slots=True)
 # TODO: Fix this error   File "/Users/ace/magic/1_projects/magnet-code/src/magnet_code/ui/tui.py", line 565, in handle_confirmation \n diff_text = confirmation.diff.create_diff() \nAttributeError: 'tuple' object has no attribute 'create_diff'
 class ToolConfirmation:
     tool_name: str
@@ -42,7 +46,7 @@ class ToolConfirmation:
     is_dangerous: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class FileDiff:
     path: Path
     old_content: str
@@ -51,7 +55,13 @@ class FileDiff:
     is_new_file: bool = False
     is_deletion: bool = False
 
+    # The diff is rendered by both the TUI and the agent events, so we compute it only once
+    _diff: str | None = field(default=None, init=False, repr=False, compare=False)
+
     def create_diff(self) -> str:
+        if self._diff is not None:
+            return self._diff
+
         import difflib
 
         old_lines = self.old_content.splitlines(keepends=True)
@@ -74,10 +84,11 @@ class FileDiff:
             tofile=new_name,
         )
 
-        return "".join(diff)
+        self._diff = "".join(diff)
+        return self._diff
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResult:
     success: bool
     output: str
@@ -89,6 +100,9 @@ class ToolResult:
     diff: FileDiff | None = None
     exit_code: int | None = None
 
+    # The model output is requested by both the hooks and the agent, so we build it only once
+    _model_output: str | None = field(default=None, init=False, repr=False, compare=False)
+
     @classmethod
     def error_result(cls, error: str, output: str = "", **kwargs: Any):
         return cls(
@@ -117,10 +131,13 @@ class ToolResult:
     def to_model_output(self) -> str:
         """If the ToolResult is succesful, returns the output of the tool, otherwise it returns
         an error. This is such that the model knows what the tool execution has done."""
-        if self.success:
-            return self.output
+        if self._model_output is None:
+            if self.success:
+                self._model_output = self.output
+            else:
+                self._model_output = f"Error: {self.error}\n\nOutput:\n{self.output}"
 
-        return f"Error: {self.error}\n\nOutput:\n{self.output}"
+        return self._model_output
 
 
 class Tool(abc.ABC):
@@ -144,23 +161,38 @@ class Tool(abc.ABC):
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         pass
 
+    def parse_params(self, invocation: ToolInvocation) -> Any:
+        """Parse the parameters of `invocation` into the tool schema model. The validator is built
+        once per model, and the parsed parameters are kept on the invocation, such that its
+        confirmation and execution only parse them once."""
+        if invocation.validated_params is None:
+            invocation.validated_params = _model_adapter(self.schema).validate_python(
+                invocation.parameters
+            )
+        return invocation.validated_params
+
     def validate_params(self, params: dict[str, Any]) -> list[str]:
         schema = self.schema
 
         if isinstance(schema, type) and issubclass(schema, BaseModel):
+            # Agents often call the same tool with the same parameters, so the validation result
+            # is memoized when the parameters are hashable. The type of each value is part of the
+            # key, since values like `1` and `True` are equal but do not validate the same way.
+            # Parameters holding large texts (e.g. file contents) are not memoized, such that the
+            # cache does not keep them alive
+            if any(
+                isinstance(value, (str, bytes)) and len(value) > _MAX_MEMOIZED_VALUE_SIZE
+                for value in params.values()
+            ):
+                return list(_validation_errors(schema, params))
+
             try:
-                schema(**params)
-            except ValidationError as e:
-                errors = []
-                for error in e.errors():
-                    # Get locations for this validation error
-                    field = ".".join(str(x) for x in error.get("loc", []))
-                    msg = error.get("msg", "Validation error")
-                    errors.append(f"Parameter '{field}': {msg}")
-
-                return errors
-            except Exception as e:
-                return [str(e)]
+                key = tuple(sorted((name, type(value), value) for name, value in params.items()))
+                hash(key)
+            except TypeError:
+                return list(_validation_errors(schema, params))
+
+            return list(_cached_validation_errors(schema, key))
         return []
 
     def is_mutating(self) -> bool:
@@ -183,6 +215,10 @@ class Tool(abc.ABC):
             description=f"Execute {self.name}",
         )
 
+    async def aclose(self) -> None:
+        """Release the resources (connections, processes) held by the tool across invocations"""
+        pass
+
     def to_openai_schema(self) -> dict[str, Any]:
         """Convert a BaseModel class or an MCP dictionary containing the details for the tool to an
         openai supported tool schema"""
@@ -190,27 +226,72 @@ class Tool(abc.ABC):
 
         # Our own tool calling
         if isinstance(schema, type) and issubclass(schema, BaseModel):
-            json_schema = model_json_schema(schema, mode="serialization")
-
             return {
                 "name": self.name,
                 "description": self.description,
-                "parameters": {
-                    "type": "object",
-                    "properties": json_schema.get("properties", {}),
-                    "required": json_schema.get("required", []),
-                },
+                "parameters": _model_parameters_schema(schema),
             }
 
-        # MCP handling
+        # MCP handling. The schema of an MCP tool is fixed once it is discovered, so its OpenAI
+        # schema is built only once per tool instance
         if isinstance(schema, dict):
-            result = {"name": self.name, "description": self.description}
+            cached = getattr(self, "_openai_schema", None)
+            if cached is None:
+                cached = self._openai_schema = {
+                    "name": self.name,
+                    "description": self.description,
+                    "parameters": schema.get("parameters", schema),
+                }
 
-            if "parameters" in schema:
-                result["parameters"] = schema["parameters"]
-            else:
-                result["parameters"] = schema
-
-            return result
+            return cached
 
         raise ValueError(f"Invalid schema type for tool {self.name}: {type(schema)}")
+
+
+@functools.cache
+def _model_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    """Get a validator for a tool parameters model, built once per model class"""
+    return TypeAdapter(schema)
+
+
+def _validation_errors(schema: type[BaseModel], params: dict[str, Any]) -> tuple[str, ...]:
+    """Validate `params` against a tool parameters model and describe each of the errors"""
+    try:
+        _model_adapter(schema).validate_python(params)
+    except ValidationError as e:
+        errors = []
+        for error in e.errors():
+            # Get locations for this validation error
+            field = ".".join(str(x) for x in error.get("loc", []))
+            msg = error.get("msg", "Validation error")
+            errors.append(f"Parameter '{field}': {msg}")
+
+        return tuple(errors)
+    except Exception as e:
+        return (str(e),)
+
+    return ()
+
+
+# Longest string or bytes parameter value whose validation result is memoized
+_MAX_MEMOIZED_VALUE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_validation_errors(
+    schema: type[BaseModel], key: tuple[tuple[str, type, Any], ...]
+) -> tuple[str, ...]:
+    return _validation_errors(schema, {name: value for name, _, value in key})
+
+
+@functools.cache
+def _model_parameters_schema(schema: type[BaseModel]) -> dict[str, Any]:
+    """Build the OpenAI parameters schema of a tool parameters model. The result only depends on
+    the model class, so it is generated once per class instead of on every LLM request."""
+    json_schema = model_json_schema(schema, mode="serialization")
+
+    return {
+        "type": "object",
+        "properties": json_schema.get("properties", {}),
+        "required": json_schema.get("required", []),
+    }
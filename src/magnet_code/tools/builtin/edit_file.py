@@ -8,7 +8,7 @@ from magnet_code.tools.base import (
     ToolKind,
     ToolResult,
 )
-from magnet_code.utils.paths import ensure_parent_directory, resolve_path
+from magnet_code.utils.paths import ensure_parent_directory, resolve_path, write_text_atomic
 
 
 class EditParams(BaseModel):
@@ -123,7 +123,19 @@ class EditTool(Tool):
                 "old_string is empty but file exists. Provide old_string to edit, or use write_file tool instead"
             )
 
-        occurrence_count = old_content.count(params.old_string)
+        # Find the occurrences and build the new content in a single pass over the file
+        if params.replace_all:
+            parts = old_content.split(params.old_string)
+            occurrence_count = len(parts) - 1
+        else:
+            index = old_content.find(params.old_string)
+            if index == -1:
+                occurrence_count = 0
+            elif old_content.find(params.old_string, index + len(params.old_string)) == -1:
+                occurrence_count = 1
+            else:
+                # Only count all the occurrences when we need to report them
+                occurrence_count = old_content.count(params.old_string)
 
         # If the string we are trying to edit is not present in the file, the LLM hallucinates or
         # does not have the last updated state
@@ -141,21 +153,26 @@ class EditTool(Tool):
                 },
             )
 
+        # The old_string is present in the file, so the content only stays the same if the
+        # replacement is identical
+        if params.old_string == params.new_string:
+            return ToolResult.error_result(
+                "No change made - old_string equals new_string"
+            )
+
         if params.replace_all:
-            new_content = old_content.replace(params.old_string, params.new_string)
+            new_content = params.new_string.join(parts)
             replace_count = occurrence_count
         else:
-            new_content = old_content.replace(params.old_string, params.new_string, 1)
-            replace_count = 1
-
-        # TODO: Should we do this above by comparing new_string and old_string before replacing?
-        if new_content == old_content:
-            return ToolResult.error_result(
-                "No change made - old_string equals new_string"
+            new_content = (
+                old_content[:index]
+                + params.new_string
+                + old_content[index + len(params.old_string) :]
             )
+            replace_count = 1
 
         try:
-            path.write_text(new_content, encoding="utf-8")
+            write_text_atomic(path, new_content)
         except IOError as e:
             return ToolResult.error_result(f"Failed to write file: {e}")
 
@@ -3,7 +3,7 @@ from pathlib import Path
 import re
 from pydantic import BaseModel, Field
 from magnet_code.tools.base import Tool, ToolInvocation, ToolKind, ToolResult
-from magnet_code.utils.paths import is_binary_file, resolve_path
+from magnet_code.utils.paths import is_binary_files, resolve_path
 
 
 class GlobParams(BaseModel):
@@ -65,12 +65,12 @@ class GlobTool(Tool):
                 for d in dirs
                 if d not in {"node_modules", "__pycache__", ".git", ".venv", "venv"}
             ]
-            for filename in filenames:
-                if filename.startswith("."):
-                    continue
-
-                file_path = Path(root) / filename
-                if not is_binary_file(file_path):
+            candidates = [
+                Path(root) / filename for filename in filenames if not filename.startswith(".")
+            ]
+            # The files of a directory are probed as a single batch
+            for file_path, is_binary in zip(candidates, is_binary_files(candidates)):
+                if not is_binary:
                     files.append(file_path)
                     if len(files) >= 500:
                         return files
@@ -1,10 +1,29 @@
+import asyncio
+import atexit
 import json
+from pathlib import Path
 import uuid
 from pydantic import BaseModel, Field
 from magnet_code.config.config import Config
 from magnet_code.config.loader import get_data_dir
 from magnet_code.tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 
+# Use orjson for (de)serializing the memory when it is installed, since it is much faster than the
+# standard library and works with bytes directly
+try:
+    import orjson
+
+    def _dumps(obj: dict) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    _loads = orjson.loads
+except ImportError:
+
+    def _dumps(obj: dict) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+    _loads = json.loads
+
 
 class MemoryParams(BaseModel):
     action: str = Field(
@@ -20,32 +39,95 @@ class MemoryParams(BaseModel):
     )
 
 
-class MemoryTool(Tool):
-    name = "memory"
-    description = "Store and retrieve persisten memory. Use this to remember user preferences, important context or notes."
-    kind = ToolKind.MEMORY
-    schema = MemoryParams
+def parse_memory(content: bytes) -> dict[str, str]:
+    """Parse the content of the user memory file into a flat key to value mapping. Memory files
+    written in the older `{"entries": {...}}` format are migrated transparently."""
+    raw = _loads(content)
+    if not isinstance(raw, dict):
+        return {}
+
+    # Only a file holding nothing but the `entries` mapping is in the older format. A flat memory
+    # can have an `entries` key of its own, whose value is a string
+    if raw.keys() == {"entries"} and isinstance(raw["entries"], dict):
+        return raw["entries"]
+    return raw
+
 
-    def _load_memory(self) -> dict:
+class MemoryStore:
+    """In-process cache of the user memory file. The file is read once, on first use, and changes
+    are written back in the background, coalescing the changes made within `FLUSH_DELAY` seconds
+    into a single write."""
+
+    FLUSH_DELAY = 0.1
+
+    def __init__(self) -> None:
+        self._memory: dict[str, str] | None = None
+        self._lock = asyncio.Lock()
+        self._dirty = False
+        self._write_task: asyncio.Task | None = None
+        # Make sure pending changes are not lost if the process exits before they are flushed
+        atexit.register(self._flush_sync)
+
+    def _path(self) -> Path:
         data_dir = get_data_dir()
         data_dir.mkdir(parents=True, exist_ok=True)
-        path = data_dir / "user_memory.json"
+        return data_dir / "user_memory.json"
+
+    def _load(self) -> dict[str, str]:
+        path = self._path()
 
         if not path.exists():
-            return {"entries": {}}
+            return {}
 
         try:
-            content = path.read_text(encoding="utf-8")
-            return json.loads(content)
+            return parse_memory(path.read_bytes())
         except Exception:
-            return {"entries": {}}
+            return {}
+
+    def _save(self, memory: dict[str, str]) -> None:
+        self._path().write_bytes(_dumps(memory))
+
+    async def get(self) -> dict[str, str]:
+        """Get the cached memory, loading it from disk on first use"""
+        async with self._lock:
+            if self._memory is None:
+                self._memory = await asyncio.to_thread(self._load)
+            return self._memory
+
+    def mark_dirty(self) -> None:
+        """Schedule the cached memory to be written back to disk"""
+        self._dirty = True
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._flush_after(self.FLUSH_DELAY))
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._dirty or self._memory is None:
+                return
+            self._dirty = False
+            # Snapshot the entries such that they can be serialized off the event loop
+            await asyncio.to_thread(self._save, dict(self._memory))
+
+    def _flush_sync(self) -> None:
+        if self._dirty and self._memory is not None:
+            self._dirty = False
+            self._save(self._memory)
 
-    def _save_memory(self, memory: dict) -> None:
-        data_dir = get_data_dir()
-        data_dir.mkdir(parents=True, exist_ok=True)
-        path = data_dir / "user_memory.json"
 
-        path.write_text(json.dumps(memory, indent=2, ensure_ascii=False))
+# All the memory tools (including the ones of subagents) share the same memory file, so they
+# also share the same cache
+_store = MemoryStore()
+
+
+class MemoryTool(Tool):
+    name = "memory"
+    description = "Store and retrieve persisten memory. Use this to remember user preferences, important context or notes."
+    kind = ToolKind.MEMORY
+    schema = MemoryParams
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
         params = MemoryParams(**invocation.parameters)
@@ -56,42 +138,41 @@ class MemoryTool(Tool):
                     "`key` and `value` are required for `set` action"
                 )
 
-            memory = self._load_memory()
-            memory["entries"][params.key] = params.value
-            self._save_memory(memory)
+            memory = await _store.get()
+            memory[params.key] = params.value
+            _store.mark_dirty()
 
             return ToolResult.success_result(f"Set memory: {params.key}")
         elif params.action.lower() == "get":
             if not params.key:
                 return ToolResult.error_result("`key` required for `get` action")
 
-            memory = self._load_memory()
-            if params.key not in memory.get("entries", {}):
+            memory = await _store.get()
+            if params.key not in memory:
                 return ToolResult.success_result(
                     f"Memory not found: {params.key}", metadata={"found": False}
                 )
 
             return ToolResult.success_result(
-                f"Memory found: {params.key}: {memory['entries'][params.key]}",
+                f"Memory found: {params.key}: {memory[params.key]}",
                 metadata={"found": True},
             )
 
         elif params.action.lower() == "delete":
-            if not self.key:
+            if not params.key:
                 return ToolResult.error_result("`key` required for `get` action")
-            memory = self._load_memory()
+            memory = await _store.get()
 
-            if params.key not in memory.get("entries", []):
+            if params.key not in memory:
                 return ToolResult.success_result(f"Memory not found: {params.key}")
 
-            del memory["entries"][params.key]
-            self._save_memory(memory)
+            del memory[params.key]
+            _store.mark_dirty()
 
             return ToolResult.success_result(f"Memory deleted: {params.key}")
 
         elif params.action.lower() == "list":
-            memory = self._load_memory()
-            entries = memory.get("entries", {})
+            entries = await _store.get()
 
             if not entries:
                 return ToolResult.success_result(f"No memories stored", metadata={"found": False})
@@ -101,10 +182,10 @@ class MemoryTool(Tool):
 
             return ToolResult.success_result("\n".join(lines), metadata={"found": False})
         elif params.action.lower() == "clear":
-            memory = self._load_memory()
-            count = len(memory.get("entries", {}))
-            memory["entries"] = {}
-            self._save_memory(memory)
+            memory = await _store.get()
+            count = len(memory)
+            memory.clear()
+            _store.mark_dirty()
             return ToolResult.success_result(f"Cleared {count} memory entries")
         else:
             return ToolResult.error_result(f"Unknown action: {params.action}")
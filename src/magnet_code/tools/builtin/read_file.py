@@ -1,8 +1,14 @@
+import asyncio
+from collections import OrderedDict
+import mmap
+import os
+from pathlib import Path
+import stat
 from pydantic import BaseModel, Field
 
 from magnet_code.tools.base import Tool, ToolInvocation, ToolKind, ToolResult
-from magnet_code.utils.paths import is_binary_file, resolve_path
-from magnet_code.utils.text import count_tokens, truncate_text
+from magnet_code.utils.paths import BINARY_SNIFF_SIZE, is_binary_prefix, resolve_path
+from magnet_code.utils.text import count_tokens, estimate_tokens, truncate_text
 
 
 class ReadFileParams(BaseModel):
@@ -22,6 +28,121 @@ class ReadFileParams(BaseModel):
     )
 
 
+# Files bigger than this are memory mapped instead of streamed line by line
+MMAP_THRESHOLD = 256 * 1024
+# Size of the slices of a memory mapped file in which we count lines
+_COUNT_CHUNK_SIZE = 1024 * 1024
+
+
+# Results of recent reads, keyed by the path, the modification time and size of the file and the
+# requested window. Agents often re-read the same files across turns, and a changed file gets a
+# new key, so the entries never need to be invalidated
+_READ_CACHE: OrderedDict[tuple[str, int, int, int, int | None], ToolResult] = OrderedDict()
+_READ_CACHE_SIZE = 128
+
+
+def _strip_line_ending(line: bytes) -> bytes:
+    if line.endswith(b"\n"):
+        line = line[:-1]
+    if line.endswith(b"\r"):
+        line = line[:-1]
+    return line
+
+
+def _read_window(
+    path: Path, start_idx: int, end_idx: int | None, file_size: int
+) -> tuple[list[bytes], int] | None:
+    """Read only the lines in [`start_idx`, `end_idx`) of the file at `path`, without their line
+    endings, and count the total number of lines in the file without keeping the other lines.
+    Returns `None` if the file is binary, which is checked on the same open file."""
+    if file_size > MMAP_THRESHOLD:
+        return _read_window_mmap(path, start_idx, end_idx)
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if is_binary_prefix(data[:BINARY_SNIFF_SIZE]):
+        return None
+
+    total_lines = _count_lines(data)
+    return _split_window(data, start_idx, end_idx, total_lines), total_lines
+
+
+def _read_window_mmap(
+    path: Path, start_idx: int, end_idx: int | None
+) -> tuple[list[bytes], int] | None:
+    """Same as `_read_window`, but for large files: the file is memory mapped and only the bytes
+    of the requested window are copied out of the mapping"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if is_binary_prefix(mm[:BINARY_SNIFF_SIZE]):
+            return None
+
+        total_lines = _count_lines(mm)
+        return _split_window(mm, start_idx, end_idx, total_lines), total_lines
+
+
+def _count_lines(data: bytes | mmap.mmap) -> int:
+    """Count the lines in `data` by counting the newline bytes, which is a single C level scan
+    that does not decode the content nor create an object per line"""
+    size = len(data)
+    if isinstance(data, mmap.mmap):
+        # A mapping has no `count`, so we count in slices to not copy the whole file at once
+        newlines = sum(
+            data[i : i + _COUNT_CHUNK_SIZE].count(b"\n")
+            for i in range(0, size, _COUNT_CHUNK_SIZE)
+        )
+    else:
+        newlines = data.count(b"\n")
+
+    # Every newline ends a line, and the last line might not have one
+    if size and data[size - 1] != ord("\n"):
+        newlines += 1
+
+    return newlines
+
+
+def _split_window(
+    data: bytes | mmap.mmap, start_idx: int, end_idx: int | None, total_lines: int
+) -> list[bytes]:
+    """Split only the lines in [`start_idx`, `end_idx`) out of `data`, by jumping from newline to
+    newline, such that no object is created for the lines outside of the window"""
+    if start_idx >= total_lines:
+        return []
+
+    # Skip to the start of the first line in the window
+    start = 0
+    for _ in range(start_idx):
+        start = data.find(b"\n", start) + 1
+
+    if end_idx is None or end_idx >= total_lines:
+        end = len(data)
+    else:
+        end = start
+        for _ in range(end_idx - start_idx):
+            end = data.find(b"\n", end) + 1
+
+    window = data[start:end]
+    if not window:
+        return []
+
+    lines = window.split(b"\n")
+    # A window ending with a newline does not have an additional empty line
+    if window.endswith(b"\n"):
+        lines.pop()
+
+    return [_strip_line_ending(line) for line in lines]
+
+
+def _decode_lines(lines: list[bytes]) -> list[str]:
+    data = b"\n".join(lines)
+    try:
+        content = data.decode("utf-8")
+    except UnicodeDecodeError:
+        content = data.decode("latin-1")
+
+    return content.split("\n")
+
+
 class ReadFileTool(Tool):
     name = "read_file"
     description = (
@@ -41,13 +162,16 @@ class ReadFileTool(Tool):
         params = ReadFileParams(**invocation.parameters)
         path = resolve_path(invocation.cwd, params.path)
 
-        if not path.exists():
+        # A single stat call tells us if the file exists, if it is a regular file and its size
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
             return ToolResult.error_result(f"File not found: {path}")
 
-        if not path.is_file():
+        if not stat.S_ISREG(st.st_mode):
             return ToolResult.error_result(f"Path is not a file: {path}")
 
-        file_size = path.stat().st_size
+        file_size = st.st_size
 
         if file_size > self.MAX_FILE_SIZE:
             return ToolResult.error_result(
@@ -55,20 +179,37 @@ class ReadFileTool(Tool):
                 f"Maximum is {self.MAX_FILE_SIZE / (1024*1024):.0f} MB."
             )
 
-        if is_binary_file(path):
-            return ToolResult.error_result(
-                f"Cannot read binary file: {path.name}"
-                f"This tool only reads text files."
-            )
+        key = (str(path), st.st_mtime_ns, file_size, params.line, params.limit)
+        result = _READ_CACHE.get(key)
+        if result is not None:
+            _READ_CACHE.move_to_end(key)
+            return result
+
+        result = await self._read(path, params, file_size)
 
+        if result.success:
+            _READ_CACHE[key] = result
+            if len(_READ_CACHE) > _READ_CACHE_SIZE:
+                _READ_CACHE.popitem(last=False)
+
+        return result
+
+    async def _read(self, path: Path, params: ReadFileParams, file_size: int) -> ToolResult:
         try:
-            try:
-                content = path.read_text(encoding="utf-8")
-            except UnicodeDecodeError:
-                content = path.read_text(encoding="latin-1")
+            start_idx = max(0, params.line - 1)
+            end_idx = start_idx + params.limit if params.limit is not None else None
 
-            lines = content.splitlines()
-            total_lines = len(lines)
+            # Read only the requested lines, off the event loop, such that other tool calls are
+            # not blocked
+            read = await asyncio.to_thread(_read_window, path, start_idx, end_idx, file_size)
+
+            if read is None:
+                return ToolResult.error_result(
+                    f"Cannot read binary file: {path.name}"
+                    f"This tool only reads text files."
+                )
+
+            window, total_lines = read
 
             if total_lines == 0:
                 return ToolResult.success_result(
@@ -78,24 +219,35 @@ class ReadFileTool(Tool):
                     },
                 )
 
-            start_idx = max(0, params.line - 1)
-
-            if params.limit is not None:
-                end_idx = min(start_idx + params.limit, total_lines)
-            else:
+            if end_idx is None or end_idx > total_lines:
                 end_idx = total_lines
 
-            selected_lines = lines[start_idx:end_idx]
-            formatted_lines = []
+            selected_lines = _decode_lines(window) if window else []
 
-            for i, line in enumerate(selected_lines, start=start_idx):
-                formatted_lines.append(f"{i:6}|{line}")
-
-           
             # TODO: How do we pass model here?
             model = "gpt-o1" 
-            output = "\n".join(formatted_lines)
-            token_count = count_tokens(output, model)
+            # Number the lines while joining them, without keeping an intermediate list of the
+            # formatted lines around
+            output = "\n".join(
+                f"{i:6}|{line}" for i, line in enumerate(selected_lines, start=start_idx + 1)
+            )
+
+            # Estimate the tokens with the ~4 characters per token heuristic first, such that we
+            # only tokenize the output when it is close to the limit. Longer outputs are cut to a
+            # generous upper bound of characters before being tokenized, and the single token
+            # count is reused when truncating them precisely.
+            suffix = f"\n... [truncated {total_lines} total lines]"
+            max_chars = self.MAX_OUTPUT_TOKENS * 6
+            clipped = False
+            # Non-ascii outputs are estimated from their utf-8 length, see `estimate_tokens`
+            approx_tokens = estimate_tokens(output)
+            if approx_tokens < self.MAX_OUTPUT_TOKENS * 0.6:
+                token_count = approx_tokens
+            else:
+                if len(output) > max_chars:
+                    output = output[:max_chars]
+                    clipped = True
+                token_count = count_tokens(output, model)
 
             truncated = False
             if token_count > self.MAX_OUTPUT_TOKENS:
@@ -103,9 +255,14 @@ class ReadFileTool(Tool):
                     output,
                     model,
                     self.MAX_OUTPUT_TOKENS,
-                    suffix=f"\n... [truncated {total_lines} total lines]",
+                    suffix=suffix,
+                    token_count=token_count,
                 )
                 truncated = True
+            elif clipped:
+                # The clipped output happens to fit, but it is still only part of the content
+                output += suffix
+                truncated = True
 
             metadata_lines = []
             if start_idx > 0 and end_idx < total_lines:
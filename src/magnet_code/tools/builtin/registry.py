@@ -1,3 +1,4 @@
+import itertools
 import logging
 from pathlib import Path
 from typing import Any
@@ -16,6 +17,15 @@ class ToolRegistry:
         self._tools: dict[str, Tool] = {}
         self._mcp_tools: dict[str, Tool] = {}
         self.config = config
+        # Names of the tools exposed to the LLM, or `None` if all of them are
+        self._allowed: frozenset[str] | None = (
+            frozenset(config.allowed_tools) if config.allowed_tools else None
+        )
+
+        # The tools and their schemas are requested on every LLM turn, but they only change when
+        # a tool is (un)registered, so we build them once and invalidate them on every change
+        self._cached_tools: list[Tool] | None = None
+        self._cached_schemas: list[dict[str, Any]] | None = None
 
     @property
     def connected_mcp_servers(self) -> list[Tool]:
@@ -26,19 +36,26 @@ class ToolRegistry:
             logger.warning(f"Overwriting existing tool: {tool.name}")
 
         self._tools[tool.name] = tool
+        self._invalidate_cache()
         logger.debug(f"Registered tool: {tool.name}")
 
     def register_mcp_tool(self, tool: Tool) -> None:
         self._mcp_tools[tool.name] = tool
+        self._invalidate_cache()
         logger.debug(f"Registered MCP tool: {tool.name}")
 
     def unregister(self, name: str) -> bool:
         if name in self._tools:
             del self._tools[name]
+            self._invalidate_cache()
             return True
 
         return False
 
+    def _invalidate_cache(self) -> None:
+        self._cached_tools = None
+        self._cached_schemas = None
+
     def get(self, name: str) -> Tool | None:
         if name in self._tools:
             return self._tools[name]
@@ -46,28 +63,37 @@ class ToolRegistry:
             return self._mcp_tools[name]
         return None
 
-    def get_tools(self) -> list[Tool]:
-        """Get a list of all the available tools in this registry"""
-        tools: list[Tool] = []
+    async def aclose(self) -> None:
+        """Release the resources held by all the registered tools"""
+        for tool in itertools.chain(self._tools.values(), self._mcp_tools.values()):
+            try:
+                await tool.aclose()
+            except Exception:
+                logger.exception(f"Failed to close tool {tool.name}")
 
-        for tool in self._tools.values():
-            tools.append(tool)
+    def get_tools(self) -> list[Tool]:
+        """Get a list of all the available tools in this registry. The returned list is shared
+        between calls and must not be modified."""
+        if self._cached_tools is not None:
+            return self._cached_tools
 
-        for mcp_tool in self._mcp_tools.values():
-            tools.append(mcp_tool)
+        tools = list(itertools.chain(self._tools.values(), self._mcp_tools.values()))
 
         # Filter allowed tools
-        if self.config.allowed_tools:
-            allowed_set = set(self.config.allowed_tools)
-            tools = [t for t in tools if t.name in allowed_set]
+        if self._allowed is not None:
+            tools = [t for t in tools if t.name in self._allowed]
 
+        self._cached_tools = tools
         return tools
 
     def get_schemas(self) -> list[dict[str, Any]]:
         """Convert the list of tools into an OpenAI API compatible tool schema in order to be
         added to the LLM request such that the LLM knows which are the available tools
         """
-        return [tool.to_openai_schema() for tool in self.get_tools()]
+        if self._cached_schemas is None:
+            self._cached_schemas = [tool.to_openai_schema() for tool in self.get_tools()]
+
+        return self._cached_schemas
 
     async def invoke(
         self,
@@ -89,7 +115,7 @@ class ToolRegistry:
                 f"Unknown tool: {name}",
                 metadata={"tool_name": name},
             )
-            await hook_system.trigger_after_tool(name, params,result)
+            hook_system.schedule_after_tool(name, params, result)
             return result
 
         # Validate that the parameters given from the LLM, match the model tool schema
@@ -104,7 +130,7 @@ class ToolRegistry:
                 },
             )
 
-            await hook_system.trigger_after_tool(name, params, result)
+            hook_system.schedule_after_tool(name, params, result)
 
             return result
 
@@ -129,7 +155,7 @@ class ToolRegistry:
 
                 if decision == ApprovalDecision.REJECTED:
                     result = ToolResult.error_result("Operation rejected by safety policy")
-                    await hook_system.trigger_after_tool(name, params, result)
+                    hook_system.schedule_after_tool(name, params, result)
                     return result
 
                 elif decision == ApprovalDecision.NEEDS_CONFIRMATION:
@@ -137,7 +163,7 @@ class ToolRegistry:
 
                     if not approved:
                         result = ToolResult.error_result("User rejected the operation")
-                        await hook_system.trigger_after_tool(name, params, result)
+                        hook_system.schedule_after_tool(name, params, result)
                         return result
 
 
@@ -151,7 +177,10 @@ class ToolRegistry:
                     "tool_name": name,
                 },
             )
-            await hook_system.trigger_after_tool(name, params, result)
+
+        # The after tool hooks only observe the result, so they run in the background instead of
+        # delaying it
+        hook_system.schedule_after_tool(name, params, result)
 
         return result
 
@@ -1,13 +1,20 @@
 import asyncio
 import os
 from pathlib import Path
-import signal
+import re
+import stat
 import sys
+from magnet_code.config.config import Config
 from magnet_code.tools.base import Tool, ToolConfirmation, ToolInvocation, ToolKind, ToolResult
 from pydantic import BaseModel, Field
 import fnmatch
 
 from magnet_code.utils.paths import resolve_path
+from magnet_code.utils.process import (
+    kill_process_group,
+    new_process_group_kwargs,
+    wait_process,
+)
 
 BLOCKED_COMMANDS = {
     "rm -rf /",
@@ -29,6 +36,48 @@ BLOCKED_COMMANDS = {
     "init 6",
 }
 
+# All the blocked commands are matched in a single pass over the command, instead of scanning the
+# command once for each of them. An Aho-Corasick automaton is used when pyahocorasick is installed,
+# since it stays linear in the command length however many commands get blocked, and a single
+# alternation regex otherwise
+try:
+    import ahocorasick
+
+    _BLOCKED_AUTOMATON = ahocorasick.Automaton()
+    for _blocked in BLOCKED_COMMANDS:
+        _BLOCKED_AUTOMATON.add_word(_blocked, _blocked)
+    _BLOCKED_AUTOMATON.make_automaton()
+
+    def _is_blocked(command: str) -> bool:
+        return next(_BLOCKED_AUTOMATON.iter(command), None) is not None
+
+except ImportError:
+    _BLOCKED_RE = re.compile("|".join(re.escape(blocked) for blocked in BLOCKED_COMMANDS))
+
+    def _is_blocked(command: str) -> bool:
+        return _BLOCKED_RE.search(command) is not None
+
+# Maximum number of bytes kept from each of the output streams of a command
+MAX_OUTPUT_BYTES = 100 * 1024
+# Size of the chunks in which the output streams are read
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+async def _read_capped(stream: asyncio.StreamReader, limit: int) -> tuple[bytes, bool]:
+    """Read `stream` until EOF or until more than `limit` bytes were read, such that a command
+    producing a huge output never gets fully buffered in memory. Returns the (at most `limit`)
+    bytes read and whether the stream went over the limit."""
+    chunks: list[bytes] = []
+    size = 0
+
+    while chunk := await stream.read(_READ_CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return b"".join(chunks)[:limit], True
+
+    return b"".join(chunks), False
+
 
 class ShellParams(BaseModel):
     command: str = Field(..., description="The shell command to execute")
@@ -44,20 +93,41 @@ class ShellTool(Tool):
     description = "Execute a shell command. Use this for running system commands, scripts and CLI tools."
     schema = ShellParams
 
+    def __init__(self, config: Config) -> None:
+        super().__init__(config)
+        # The environment of the commands is built once and reused until the shell environment
+        # configuration changes
+        self._env: dict[str, str] | None = None
+        self._env_key: tuple | None = None
+
+    def _environment(self) -> dict[str, str]:
+        shell_environment = self.config.shell_environment
+        key = (
+            id(shell_environment),
+            shell_environment.ignore_default_excludes,
+            tuple(shell_environment.exclude_patterns),
+            tuple(shell_environment.set_vars.items()),
+        )
+
+        if self._env is None or key != self._env_key:
+            self._env = shell_environment._build_environment()
+            self._env_key = key
+
+        return self._env
+
     async def get_confirmation(self, invocation) -> ToolConfirmation:
-        params = ShellParams(**invocation.parameters)
+        params: ShellParams = self.parse_params(invocation)
 
         command = params.command.lower().strip()
         
-        for blocked in BLOCKED_COMMANDS:
-            if blocked in command:
-                return ToolConfirmation(
-                    tool_name = self.name,
-                    params = invocation.parameters,
-                    description=f"Execute (BLOCKED): {command}",
-                    command=params.command,
-                    is_dangerous=True,
-                )
+        if _is_blocked(command):
+            return ToolConfirmation(
+                tool_name = self.name,
+                params = invocation.parameters,
+                description=f"Execute (BLOCKED): {command}",
+                command=params.command,
+                is_dangerous=True,
+            )
 
         return ToolConfirmation(
             tool_name = self.name,
@@ -68,15 +138,14 @@ class ShellTool(Tool):
         )
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
-        params = ShellParams(**invocation.parameters)
+        params: ShellParams = self.parse_params(invocation)
 
         command = params.command.lower().strip()
-        for blocked in BLOCKED_COMMANDS:
-            if blocked in command:
-                return ToolResult.error_result(
-                    f"Command blocked for safety: {params.command}",
-                    metadata={"blocked": True},
-                )
+        if _is_blocked(command):
+            return ToolResult.error_result(
+                f"Command blocked for safety: {params.command}",
+                metadata={"blocked": True},
+            )
 
         if params.cwd:
             cwd = Path(params.cwd)
@@ -89,21 +158,29 @@ class ShellTool(Tool):
         else:
             cwd = invocation.cwd
 
-        if not cwd.exists():
+        # A single stat tells us if the working directory exists and is actually a directory
+        try:
+            cwd_is_dir = stat.S_ISDIR(os.stat(cwd).st_mode)
+        except (FileNotFoundError, NotADirectoryError):
             return ToolResult.error_result(f"Working directory doesn't exist: {cwd}")
 
-        env = self.config.shell_environment._build_environment()
+        if not cwd_is_dir:
+            return ToolResult.error_result(f"Working directory is not a directory: {cwd}")
+
+        env = self._environment()
 
         if sys.platform == "win32":
             shell_cmd = ["cmd.exe", "/c", params.command]
         else:
             shell_cmd = ["/bin/bash", "-c", params.command]
 
-        # Print the shell environment and command and allow the user to press enter before
-        # continuing
-        print(env)
-        print(shell_cmd)
-        input("Press Enter to continue...")
+        # When debugging, print the shell environment and command and allow the user to press
+        # enter before continuing. The prompt is read off the event loop, such that other tasks
+        # keep running while waiting for it
+        if self.config.debug:
+            print(env)
+            print(shell_cmd)
+            await asyncio.to_thread(input, "Press Enter to continue...")
 
         # Create a new process with the shell command
         process = await asyncio.create_subprocess_exec(
@@ -113,22 +190,36 @@ class ShellTool(Tool):
             stderr=asyncio.subprocess.PIPE,
             cwd=cwd,
             env=env,
-            # Create a new OS session and process group
-            start_new_session=True,
+            **new_process_group_kwargs(),
         )
 
+        truncated = False
+
+        async def drain(stream: asyncio.StreamReader) -> bytes:
+            nonlocal truncated
+            data, overflow = await _read_capped(stream, MAX_OUTPUT_BYTES)
+            # There is no point in letting the command run after we stopped reading its output
+            if overflow and not truncated:
+                truncated = True
+                await kill_process_group(process)
+            return data
+
+        async def communicate() -> tuple[bytes, bytes]:
+            stdout_data, stderr_data = await asyncio.gather(
+                drain(process.stdout), drain(process.stderr)
+            )
+            await process.wait()
+            return stdout_data, stderr_data
+
         try:
             stdout_data, stderr_data = await asyncio.wait_for(
-                process.communicate(),
+                communicate(),
                 timeout=params.timeout,
             )
         except asyncio.TimeoutError:
-            # If we have a timeout error, force kill the shell
-            if sys.platform != "win32":
-                os.killpg(os.getpgid(process), signal.SIGKILL)
-            else:
-                process.kill()
-            await process.wait()
+            # If we have a timeout error, kill the shell and its children
+            await kill_process_group(process)
+            await wait_process(process)
             return ToolResult.error_result(f"Command timed out after {params.timeout}")
 
         # Convert the data to string
@@ -151,10 +242,14 @@ class ShellTool(Tool):
         # If output is bigger than 1Kb
         if len(output) > 100 * 1024:
             output = output[:100 * 1024] + '\n... [output truncated]'
+            truncated = True
+        elif truncated:
+            output += '\n... [output truncated, command terminated]'
             
         return ToolResult(
             success=exit_code==0,
             error=stderr if exit_code != 0 else None,
             exit_code=exit_code,
             output=output,
+            truncated=truncated,
         )
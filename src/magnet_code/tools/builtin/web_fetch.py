@@ -1,14 +1,20 @@
 import os
 from pathlib import Path
 import re
-from urllib.parse import urlparse
 from ddgs import DDGS
 import httpx
 from pydantic import BaseModel, Field
+from magnet_code.config.config import Config
 from magnet_code.tools.base import Tool, ToolInvocation, ToolKind, ToolResult
 from magnet_code.utils.paths import is_binary_file, resolve_path
 
 
+# Maximum number of bytes of the response body that are kept
+MAX_CONTENT_BYTES = 100 * 1024
+# Size of the chunks in which the response body is downloaded
+_READ_CHUNK_SIZE = 16 * 1024
+
+
 class WebFetchParams(BaseModel):
     url: str = Field(..., description="URL to fetch (must be http:// or https://)")
     timeout: int = Field(
@@ -25,23 +31,55 @@ class WebFetchTool(Tool):
     kind = ToolKind.NETWORK
     schema = WebFetchParams
 
-    async def execute(self, invocation: ToolInvocation) -> ToolResult:
-        params = WebFetchParams(**invocation.parameters)
+    def __init__(self, config: Config) -> None:
+        super().__init__(config)
+        # HTTP client shared by all the fetches of this tool, such that connections are pooled
+        # and kept alive between fetches instead of paying for a new TCP and TLS handshake on
+        # every call. Created on first use.
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,  # 301 / 302
+                limits=httpx.Limits(max_keepalive_connections=20),
+            )
+        return self._client
 
-        # Check if the url is accurate and not hallucinated
-        parsed = urlparse(params.url)
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-        if not parsed.scheme or parsed.scheme not in {"http,", "https"}:
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params: WebFetchParams = self.parse_params(invocation)
+
+        # Check if the url is accurate and not hallucinated. Only the scheme is needed, so a prefix
+        # check is enough instead of fully parsing the url
+        if not params.url.lower().startswith(("http://", "https://")):
             return ToolResult.error_result(f"URL must be http:// or https://")
 
         try:
-            async with httpx.AsyncClient(
-                timeout=httpx.Timeout(params.timeout),
-                follow_redirects=True,  # 301 / 302
-            ) as client:
-                response = await client.get(params.url)
+            # The timeout is given per request, since each call can ask for its own
+            async with self._get_client().stream(
+                "GET", params.url, timeout=httpx.Timeout(params.timeout)
+            ) as response:
                 response.raise_for_status()
-                text = response.text
+
+                # Stop downloading once we have more than we are going to keep, such that huge
+                # pages are neither fully downloaded nor fully decoded
+                body = bytearray()
+                truncated = False
+                async for chunk in response.aiter_bytes(chunk_size=_READ_CHUNK_SIZE):
+                    body += chunk
+                    if len(body) > MAX_CONTENT_BYTES:
+                        truncated = True
+                        break
+
+                content_length = len(body)
+                text = bytes(body[:MAX_CONTENT_BYTES]).decode(
+                    response.encoding or "utf-8", errors="replace"
+                )
         except httpx.HTTPStatusError as e:
             return ToolResult.error_result(
                 f"HTTP {e.response.status_code}: {e.response.reason_phrase}"
@@ -49,13 +87,14 @@ class WebFetchTool(Tool):
         except Exception as e:
             return ToolResult.error_result(f"Web request failed: {e}")
 
-        if len(text) > 100 * 1024:
-            text = text[: 100 * 1024] + "\n... [content truncated]"
+        if truncated:
+            text += "\n... [content truncated]"
 
         return ToolResult.success_result(
             text,
             metadata={
                 "status_code": response.status_code,
-                "content_length": len(response.content),
+                "content_length": content_length,
             },
+            truncated=truncated,
         )
@@ -1,6 +1,13 @@
+import os
 from pydantic import BaseModel, Field
 from magnet_code.tools.base import FileDiff, Tool, ToolConfirmation, ToolInvocation, ToolKind, ToolResult
 from magnet_code.utils.paths import ensure_parent_directory, resolve_path
+from magnet_code.utils.text import count_lines
+
+
+# Existing files bigger than this are overwritten without reading them first, and their write
+# result has no diff, since such a diff is too big to be useful
+MAX_DIFF_FILE_SIZE = 1024 * 1024
 
 
 class WriteFileParams(BaseModel):
@@ -25,7 +32,7 @@ class WriteFileTool(Tool):
     schema = WriteFileParams
 
     async def get_confirmation(self, invocation) -> ToolConfirmation:
-        params = WriteFileParams(**invocation.parameters)
+        params: WriteFileParams = self.parse_params(invocation)
         path = resolve_path(invocation.cwd, params.path)
         
         is_new_file = not path.exists()
@@ -56,20 +63,30 @@ class WriteFileTool(Tool):
         )
 
     async def execute(self, invocation: ToolInvocation) -> ToolResult:
-        params = WriteFileParams(**invocation.parameters)
+        params: WriteFileParams = self.parse_params(invocation)
         path = resolve_path(invocation.cwd, params.path)
 
-        # Read potential existing content if the file already exists
-        is_new_file = not path.exists()
-        old_content = ""
-
-        if not is_new_file:
+        try:
+            # A single stat tells us if the file already exists and if its content is small
+            # enough to be read for the diff
             try:
-                old_content = path.read_text(encoding="utf-8")
-            except:
-                pass
+                old_size = os.stat(path).st_size
+                is_new_file = False
+            except (FileNotFoundError, NotADirectoryError):
+                old_size = 0
+                is_new_file = True
+
+            old_content: str | None = ""
+
+            if not is_new_file:
+                if old_size > MAX_DIFF_FILE_SIZE:
+                    old_content = None
+                else:
+                    try:
+                        old_content = path.read_text(encoding="utf-8")
+                    except:
+                        pass
 
-        try:
             if params.create_directories:
                 ensure_parent_directory(path)
             elif not path.parent.exists():
@@ -80,15 +97,19 @@ class WriteFileTool(Tool):
             path.write_text(params.content, encoding="utf-8")
 
             action = "Created" if is_new_file else "Updated"
-            line_count = len(params.content.splitlines())
+            line_count = count_lines(params.content)
 
             return ToolResult.success_result(
                 f"{action} {path} {line_count} lines",
-                diff=FileDiff(
-                    path=path,
-                    old_content=old_content,
-                    new_content=params.content,
-                    is_new_file=is_new_file,
+                diff=(
+                    FileDiff(
+                        path=path,
+                        old_content=old_content,
+                        new_content=params.content,
+                        is_new_file=is_new_file,
+                    )
+                    if old_content is not None
+                    else None
                 ),
                 metadata={
                     "path": str(path),
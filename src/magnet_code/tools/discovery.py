@@ -1,6 +1,8 @@
+import asyncio
 import importlib
 import importlib.util
 import inspect
+import os
 from pathlib import Path
 import sys
 from typing import Any
@@ -10,12 +12,22 @@ from magnet_code.tools.base import Tool
 from magnet_code.tools.builtin.registry import ToolRegistry
 
 
+# Modules of the discovered tool files, keyed by their path and validated against the
+# modification time of the file, such that an unchanged file is not executed again each time the
+# tools are discovered (every session and subagent discovers them)
+_MODULE_CACHE: dict[Path, tuple[int, Any]] = {}
+
+
 class ToolDiscoveryManager:
     def __init__(self, config: Config, registry: ToolRegistry):
         self.config = config
         self.registry = registry
 
     def _load_tool_modules(self, file_path: Path) -> Any:
+        mtime_ns = file_path.stat().st_mtime_ns
+        cached = _MODULE_CACHE.get(file_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
 
         # TODO: What about import_module lib?
         module_name = f"discovered_tool_{file_path.stem}"
@@ -29,6 +41,8 @@ class ToolDiscoveryManager:
         sys.modules[module_name] = module
         # Read the python file and execute the code
         spec.loader.exec_module(module)
+
+        _MODULE_CACHE[file_path] = (mtime_ns, module)
         return module
 
     def _find_tool_classes(self, module: Any) -> list[Tool]:
@@ -50,32 +64,52 @@ class ToolDiscoveryManager:
         return tools
                 
 
-    def discover_from_directory(self, directory: Path) -> None:
-        tool_dir = directory / ".magnet" / "tools"
+    def _load_and_inspect(self, file_path: Path) -> list[type[Tool]]:
+        """Load the module of a tool file and find the tools defined in it. A file which fails to
+        load does not define any tool."""
+        try:
+            return self._find_tool_classes(self._load_tool_modules(file_path))
+        except Exception:
+            return []
 
-        if not tool_dir.exists() or not tool_dir.is_dir():
-            return
+    async def _load_directory(self, directory: Path) -> list[type[Tool]]:
+        tool_dir = directory / ".magnet" / "tools"
 
-        for py_file in tool_dir.glob("*.py"):
+        # List the directory with a single scandir, filtering the entries by their name only,
+        # instead of checking that the directory exists first and globbing it
+        try:
+            with os.scandir(tool_dir) as it:
+                py_files = [
+                    Path(entry.path)
+                    for entry in it
+                    # Skip __init__.py, __main__.py
+                    if entry.name.endswith(".py") and not entry.name.startswith("__")
+                ]
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+        # Read, compile and execute the tool files on worker threads, concurrently
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._load_and_inspect, py_file) for py_file in py_files)
+        )
+        return [tool_class for tool_classes in results for tool_class in tool_classes]
+
+    def _register(self, tool_classes: list[type[Tool]]) -> None:
+        # The registry is not thread safe, so the tools are registered on the event loop thread
+        for tool_class in tool_classes:
             try:
-                # __init__.py, __main__.py
-                if py_file.name.startswith("__"):
-                    continue
-
-                module = self._load_tool_modules(py_file)
-                tool_classes = self._find_tool_classes(module)
-                
-                if not tool_classes:
-                    continue
-                
-                for tool_class in tool_classes:
-                    tool = tool_class(self.config)
-                    self.registry.register(tool)
-
+                self.registry.register(tool_class(self.config))
             except Exception:
                 continue
 
-
-    def discover_all(self) -> None:
-        self.discover_from_directory(self.config.cwd)
-        self.discover_from_directory(get_config_dir())
+    async def discover_from_directory(self, directory: Path) -> None:
+        self._register(await self._load_directory(directory))
+
+    async def discover_all(self) -> None:
+        # Both directories are loaded concurrently, but their tools are registered in order, such
+        # that the tools of the config directory still override the ones of the working directory
+        for tool_classes in await asyncio.gather(
+            self._load_directory(self.config.cwd),
+            self._load_directory(get_config_dir()),
+        ):
+            self._register(tool_classes)
@@ -2,6 +2,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 import os
 from pathlib import Path
+import sys
 from typing import Any
 
 from fastmcp import Client
@@ -24,10 +25,19 @@ class MCPToolInfo:
 
 
 class MCPClient:
-    def __init__(self, name: str, config: MCPServerConfig, cwd: Path):
+    def __init__(
+        self,
+        name: str,
+        config: MCPServerConfig,
+        cwd: Path,
+        base_env: dict[str, str] | None = None,
+    ):
         self.name = name
         self.config = config
         self.cwd = cwd
+        # Environment the server configured variables are applied on, shared by all the clients
+        # of a manager such that it is not rebuilt for every server
+        self._base_env = base_env
         self.status = MCPServerStatus.DISCONNECTED
         self._client: Client | None = None
 
@@ -37,10 +47,17 @@ class MCPClient:
     def tools(self) -> list[MCPToolInfo]:
         return list(self._tools.values())
 
+    @property
+    def tool_count(self) -> int:
+        return len(self._tools)
+
     def _create_transport(self) -> StdioTransport | SSETransport:
         if self.config.command:
-            env = ShellEnvironmentPolicy(ignore_default_excludes=True)._build_environment()
-            env.update(self.config.env)
+            if self._base_env is None:
+                self._base_env = ShellEnvironmentPolicy(
+                    ignore_default_excludes=True
+                )._build_environment()
+            env = {**self._base_env, **self.config.env}
 
             return StdioTransport(
                 command=self.config.command,
@@ -66,13 +83,18 @@ class MCPClient:
             await self._client.__aenter__()
 
             tool_result = await self._client.list_tools()
-            for tool in tool_result:
-                self._tools[tool.name] = MCPToolInfo(
-                    name=tool.name,
+            # The server name is repeated in every tool info, and tool names are looked up often,
+            # so they are interned to share a single copy of each
+            server_name = sys.intern(self.name)
+            self._tools = {
+                (name := sys.intern(tool.name)): MCPToolInfo(
+                    name=name,
                     description=tool.description or "",
-                    input_schema=(tool.inputSchema if hasattr(tool, "inputSchem") else {}),
-                    server_name=self.name
+                    input_schema=getattr(tool, "inputSchema", None) or {},
+                    server_name=server_name,
                 )
+                for tool in tool_result
+            }
 
             self.status = MCPServerStatus.CONNECTED
 
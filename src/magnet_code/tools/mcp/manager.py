@@ -1,26 +1,29 @@
 import asyncio
 from typing import Any
-from magnet_code.config.config import Config
+from magnet_code.config.config import Config, ShellEnvironmentPolicy
 from magnet_code.tools.builtin.registry import ToolRegistry
 from magnet_code.tools.mcp.client import MCPClient, MCPServerStatus
 from magnet_code.tools.mcp.tool import MCPTool
 
 
 class MCPManager:
+    # Maximum number of servers (processes) started or stopped at the same time
+    MAX_CONCURRENT_CONNECTIONS = 8
+
     def __init__(self, config: Config):
         self.config = config
         self._clients: dict[str, MCPClient] = {}
         self._initialized = False
 
     def get_all_servers(self) -> list[dict[str, Any]]:
-        servers = []
-        for name, client in self._clients.items():
-            servers.append({
+        return [
+            {
                 'name': name,
                 'status': client.status.value,
-                'tools': len(client.tools),
-            })
-        return servers
+                'tools': client.tool_count,
+            }
+            for name, client in self._clients.items()
+        ]
 
     async def initialize(self) -> None:
         if self._initialized:
@@ -31,6 +34,9 @@ class MCPManager:
         if not mcp_configs:
             return
 
+        # The base environment of the servers is the same for all of them, so it is built once
+        base_env = ShellEnvironmentPolicy(ignore_default_excludes=True)._build_environment()
+
         for name, server_config in mcp_configs.items():
             if not server_config.enabled:
                 continue
@@ -39,21 +45,36 @@ class MCPManager:
                 name=name,
                 config=server_config,
                 cwd=self.config.cwd,
+                base_env=base_env,
             )
 
-        connection_tasks = [asyncio.wait_for(client.connect(), timeout=client.config.startup_timeout_sec) for _name, client in self._clients.items()]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CONNECTIONS)
 
-        await asyncio.gather(*connection_tasks, return_exceptions=True)
+        async def connect(client: MCPClient) -> None:
+            async with semaphore:
+                # A server failing to connect is left in the error state and does not cancel the
+                # connection of the other servers
+                try:
+                    await asyncio.wait_for(
+                        client.connect(), timeout=client.config.startup_timeout_sec
+                    )
+                except Exception:
+                    pass
+
+        async with asyncio.TaskGroup() as tg:
+            for client in self._clients.values():
+                tg.create_task(connect(client))
 
         self._initialized = True
 
 
     def register_tools(self, registry: ToolRegistry) -> int:
         count = 0
+        connected = MCPServerStatus.CONNECTED
 
         for client in self._clients.values():
             # Only register tools from a connected MCP server
-            if client.status != MCPServerStatus.CONNECTED:
+            if client.status != connected:
                 continue
 
             for tool_info in client.tools:
@@ -70,9 +91,18 @@ class MCPManager:
 
     async def shutdown(self) -> None:
         """Disconnect all the mcp clients"""
-        disconnection_tasks = [client.disconnect() for client in self._clients.values()]
-
-        await asyncio.gather(*disconnection_tasks, return_exceptions=True)
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CONNECTIONS)
+
+        async def disconnect(client: MCPClient) -> None:
+            async with semaphore:
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+
+        async with asyncio.TaskGroup() as tg:
+            for client in self._clients.values():
+                tg.create_task(disconnect(client))
 
         self._clients.clear()
         self._initialized = False
\ No newline at end of file
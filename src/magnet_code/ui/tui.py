@@ -1,5 +1,7 @@
+from functools import lru_cache
+import os
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 from rich.console import Console, Group
 from rich.theme import Theme
 from rich.rule import Rule
@@ -7,7 +9,6 @@ from rich.text import Text
 from rich.panel import Panel
 from rich.table import Table
 from rich import box
-from rich.syntax import Syntax
 from rich.prompt import Prompt
 from rich.markdown import Markdown
 
@@ -17,7 +18,127 @@ from magnet_code.utils.paths import resolve_path
 
 import re
 
-from magnet_code.utils.text import truncate_text
+from magnet_code.utils.text import count_lines, truncate_text
+
+# Header which the read_file tool puts before the lines when only a part of the file is shown
+_HEADER_RE = re.compile(r"^Showing lines (\d+)-(\d+) of (\d+)\n\n")
+# Numbered line of the read_file output, capturing the code of the line
+_LINE_RE = re.compile(r"^[ \t]*\d+\|([^\n]*)$", re.MULTILINE)
+
+# Language used to highlight a file, by file extension
+_LANG_BY_SUFFIX = {
+    ".py": "python",
+    ".rs": "rust",
+    ".toml": "toml",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".jsx": "jsx",
+    ".tsx": "tsx",
+    ".md": "markdown",
+    ".json": "json",
+    ".sh": "bash",
+    ".sql": "sql",
+    ".c": "c",
+    ".h": "c",
+    ".html": "html",
+    ".css": "css",
+}
+
+# Order in which the arguments of each tool are displayed
+_PREFERRED_ARG_ORDER: dict[str, tuple[str, ...]] = {
+    "read_file": ("path", "offset", "limit"),
+    "write_file": ("path", "create_directories", "content"),
+    "edit": ("path", "replace_all", "old_string", "new_string"),
+    "shell": ("command", "timeout", "cwd"),
+    "list_dir": ("path", "include_hidden"),
+    "grep": ("path", "case_insensitive", "pattern"),
+    "glob": ("path", "pattern"),
+    "todos": ("todo_id", "action", "content"),
+    "memory": ("action", "key", "value"),
+}
+
+# The same arguments as a set, to tell the other arguments apart
+_PREFERRED_ARG_KEYS: dict[str, frozenset[str]] = {
+    tool: frozenset(keys) for tool, keys in _PREFERRED_ARG_ORDER.items()
+}
+
+# Number of buffered characters of the assistant stream after which they are printed, even if
+# no line was completed
+DELTA_FLUSH_SIZE = 512
+
+# Constant fragments of the tool call panel titles, built once and copied into each title
+_SEP = Text("  ", style="muted")
+_WAIT_ICON = Text("⌛️ ", style="muted")
+_SUCCESS_ICON = Text("✅", style="success")
+_FAILURE_ICON = Text("❌", style="error")
+
+
+def _tool_title(icon: Text, name: str, call_id: str) -> Text:
+    """Title of the panel of a tool call, appended fragment by fragment to a single `Text`"""
+    title = Text()
+    title.append_text(icon)
+    title.append(name, style="tool")
+    title.append_text(_SEP)
+    title.append(f"#{call_id[:8]}", style="muted")
+    return title
+
+
+# Arguments holding blobs of text, which are displayed as a summary of their size
+_BLOB_ARGS = ("content", "old_string", "new_string")
+
+
+def _summarize_blob(value: str) -> str:
+    line_count = count_lines(value)
+    # An ascii string has one byte per character, which saves encoding a copy of the whole blob
+    # only to measure it
+    if value.isascii():
+        byte_count = len(value)
+    else:
+        byte_count = len(value.encode("utf-8", errors="replace"))
+    return f"<{line_count} lines ⚔ {byte_count} bytes>"
+
+
+
+@lru_cache(maxsize=32)
+def _syntax_parts(lang: str, theme: str) -> tuple[Any, Any, Any]:
+    """Resolve the Pygments lexer of `lang` and the `theme` once per language and theme, instead of
+    on every rendered block. `rich.syntax` pulls in Pygments, so it is imported on first use."""
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+    from rich.syntax import Syntax
+
+    # The same lexer options `Syntax` uses when it is given a language name
+    try:
+        lexer = get_lexer_by_name(lang, stripnl=False, ensurenl=True, tabsize=4)
+    except ClassNotFound:
+        lexer = lang
+    return Syntax, lexer, Syntax.get_theme(theme)
+
+
+def _syntax(
+    code: str,
+    lang: str,
+    *,
+    theme: str = "vim",
+    line_numbers: bool = False,
+    start_line: int = 1,
+    word_wrap: bool = True,
+) -> Any:
+    """Highlight `code` as `lang`, or show a placeholder without building a `Syntax` at all when
+    there is nothing to highlight"""
+    if not code.strip():
+        return Text("(no output)", style="muted")
+
+    syntax, lexer, syntax_theme = _syntax_parts(lang, theme)
+    return syntax(
+        code,
+        lexer,
+        theme=syntax_theme,
+        line_numbers=line_numbers,
+        start_line=start_line,
+        word_wrap=word_wrap,
+    )
+
 
 AGENT_THEME = Theme(
     {
@@ -65,8 +186,17 @@ class TUI:
         # Marks if the assistant stream is currently being streamed up on display
         self._assistant_stream_open = False
         self._tool_args_by_call_id: dict[str, dict[str, Any]] = {}
-        self.cwd = self.config.cwd
+        # The `path` and `cwd` arguments of each tool call, resolved once when the call starts and
+        # reused when it completes
+        self._resolved_paths_by_call_id: dict[str, dict[str, str]] = {}
+        # Resolved once, such that displaying a path does not resolve the working directory again
+        self.cwd = Path(self.config.cwd).resolve()
         self._max_block_tokens = 2500
+        # Streamed text deltas of the assistant which are not printed yet, and their total length
+        self._delta_buffer: list[str] = []
+        self._delta_buffer_size = 0
+        # The last text truncated for display and its truncated form
+        self._last_truncated: tuple[str, str] | None = None
 
     def begin_assistant(self) -> None:
         """Assistant is starting to respond, so we update the internal state for that and print
@@ -78,13 +208,26 @@ class TUI:
     def end_assistant(self) -> None:
         """Assistant has finished streaming the response so we update the internal state
         accordingly"""
+        self.flush_assistant_delta()
         if self._assistant_stream_open:
             self.console.print()
         self._assistant_stream_open = False
 
     def stream_assistant_delta(self, content: str) -> None:
-        """Prints the streaming text delta sent from the assistant"""
-        self.console.print(content, end="", markup=False)
+        """Prints the streaming text delta sent from the assistant. The deltas are buffered and
+        printed a line at a time (or once enough text piled up), since each print is far more
+        expensive than the few characters of a delta"""
+        self._delta_buffer.append(content)
+        self._delta_buffer_size += len(content)
+        if "\n" in content or self._delta_buffer_size > DELTA_FLUSH_SIZE:
+            self.flush_assistant_delta()
+
+    def flush_assistant_delta(self) -> None:
+        """Print the buffered text deltas of the assistant, if any"""
+        if self._delta_buffer:
+            self.console.print("".join(self._delta_buffer), end="", markup=False)
+            self._delta_buffer.clear()
+            self._delta_buffer_size = 0
 
     def _ordered_args(self, tool_name: str, args: dict[str, Any]) -> list[tuple]:
         # TODO: Document the parameters of this function
@@ -99,42 +242,29 @@ class TUI:
             argument name
             argument value
         """
-        _PREFERRED_ORDER = {
-            "read_file": ["path", "offset", "limit"],
-            "write_file": ["path", "create_directories", "content"],
-            "edit": ["path", "replace_all", "old_string", "new_string"],
-            "shell": ["command", "timeout", "cwd"],
-            "list_dir": ["path", "include_hidden"],
-            "grep": ["path", "case_insensitive", "pattern"],
-            "glob": ["path", "pattern"],
-            "todos": ["todo_id", "action", "content"],
-            "memory": ["action", "key", "value"],
-        }
-
-        preferred = _PREFERRED_ORDER.get(tool_name, [])
-
-        # Keeps a list of ordered arguments and their value in a tuple
-        ordered: list[tuple[str, Any]] = []
-        # Keeps track of the seen arguments, such that if the preferred order of argument is
-        # non-exhaustive, we do not miss additional arguments
-        seen = set()
+        preferred = _PREFERRED_ARG_ORDER.get(tool_name)
+        # Tools without a preferred order keep the order the model gave the arguments in
+        if not preferred:
+            return list(args.items())
 
         # Process the preferred arguments first
-        for key in preferred:
-            if key in args:
-                ordered.append((key, args[key]))
-                seen.add(key)
+        ordered = [(key, args[key]) for key in preferred if key in args]
+        # Most calls only have preferred arguments
+        if len(ordered) == len(args):
+            return ordered
 
-        # Process the rest of the argumenst
-        remaining_keys = set(args.keys() - seen)
-        for key in remaining_keys:
-            if key in args:
-                ordered.append((key, args[key]))
+        # Process the rest of the arguments, in the order the model gave them
+        preferred_keys = _PREFERRED_ARG_KEYS[tool_name]
+        ordered.extend((key, value) for key, value in args.items() if key not in preferred_keys)
 
         return ordered
 
-    def _render_args_table(self, tool_name: str, args: dict[str, Any]) -> Table:
+    def _render_args_table(self, tool_name: str, args: dict[str, Any]) -> Table | Text:
         """Render an arguments table for of a function call to display in the TUI"""
+        # A call without arguments needs no table
+        if not args:
+            return Text("(no args)", style="muted")
+
         table = Table.grid(padding=(0, 1))
         # Argument name column
         table.add_column(style="muted", justify="right", no_wrap=True)
@@ -142,14 +272,8 @@ class TUI:
         table.add_column(style="code", overflow="fold")
 
         for key, value in self._ordered_args(tool_name, args):
-            if isinstance(value, str):
-                # Handling huge blobs of text for display
-                if key in {"content", "old_string", "new_string"}:
-                    line_count = len(value.splitlines()) or 0
-                    byte_count = len(value.encode("utf-8", errors="replace"))
-                    value = f"<{line_count} lines ⚔ {byte_count} bytes>"
-
-            table.add_row(key, str(value))
+            # Most values are already strings, which need no conversion
+            table.add_row(key, value if isinstance(value, str) else str(value))
 
         return table
 
@@ -158,28 +282,30 @@ class TUI:
     ) -> None:
         """Prints the tool call name, ID, lists argument names and their values to be easily
         identified by the user"""
+        self.flush_assistant_delta()
         self._tool_args_by_call_id[call_id] = arguments
         border_style = f"tool.{tool_kind}" if tool_kind else "tool"
 
-        title = Text.assemble(
-            ("⌛️ ", "muted"),
-            (name, "tool"),
-            ("  ", "muted"),
-            (f"#{call_id[:8]}", "muted"),
-        )
+        title = _tool_title(_WAIT_ICON, name, call_id)
 
         display_args = dict(arguments)
+        # Replace the huge blobs of text with a summary right away, such that the table never
+        # holds, nor wraps, the whole text
+        for key in _BLOB_ARGS:
+            val = display_args.get(key)
+            if isinstance(val, str):
+                display_args[key] = _summarize_blob(val)
+
+        resolved_paths: dict[str, str] = {}
         for key in ("path", "cwd"):
             val = display_args.get(key)
             if isinstance(val, str) and self.cwd:
-                display_args[key] = str(resolve_path(self.cwd, val))
+                display_args[key] = resolved_paths[key] = str(resolve_path(self.cwd, val))
+        self._resolved_paths_by_call_id[call_id] = resolved_paths
 
+        args_table = self._render_args_table(name, display_args)
         panel = Panel(
-            (
-                self._render_args_table(name, display_args)
-                if display_args
-                else Text("(no args)", style="muted")
-            ),
+            args_table,
             title=title,
             title_align="left",
             subtitle=Text("running", style="muted"),
@@ -195,52 +321,40 @@ class TUI:
     def _extract_read_file_code(self, text: str) -> tuple[int, str] | None:
         """Extracts from the ouput of the LLM, the start line that the read_file tool read and
         the code lines read"""
-        body = text
-        header_match = re.match(r"^Showing lines (\d+)-(\d+) of (\d+)\n\n", text)
-
-        if header_match:
-            # Skip the header if it exists
-            body = text[header_match.end() :]
-
-        code_lines: list[str] = []
-        start_line: int | None = None
-
-        for line in body.splitlines():
-            m = re.match(r"^\s*(\d+)\|(.*)$", line)
-            if not m:
-                return None
-            line_number = int(m.group(1))
-            if start_line is None:
-                start_line = line_number
-            code_lines.append(m.group(2))
-
-        if start_line is None:
+        # Most outputs have no header, which a plain prefix comparison tells without the regex
+        header_match = _HEADER_RE.match(text) if text.startswith("Showing lines ") else None
+
+        # Offset in `text` at which the numbered lines start
+        i = header_match.end() if header_match else 0
+
+        # The first line must have its `|` right after the line number. Outputs which are not
+        # numbered lines at all (e.g. "File is empty.") are told apart by this single bounded
+        # find, without scanning them with the regex
+        sep = text.find("|", i, i + 16)
+        if sep < 0:
             return None
 
+        # Each line is its right aligned line number, a `|` and the code. A single scan of the
+        # regex collects the code of all the lines, instead of walking and splitting them one by
+        # one in Python. It starts after the header instead of slicing the header off
+        code_lines = _LINE_RE.findall(text, i)
+
+        # Lines the regex did not match are skipped by it, so a line count mismatch means the
+        # output is not in the expected format
+        n = len(text)
+        line_count = text.count("\n", i) + (i < n and not text.endswith("\n"))
+        if not code_lines or len(code_lines) != line_count:
+            return None
+
+        start_line = int(text[i:sep])
         return start_line, "\n".join(code_lines)
 
     def _guess_language(self, path: str | None) -> str:
         """Guess the programming language from the file extension of the `path`"""
         if not path:
             return "text"
-        suffix = Path(path).suffix.lower()
-        return {
-            ".py": "python",
-            ".rs": "rust",
-            ".toml": "toml",
-            ".js": "javascript",
-            ".ts": "typescript",
-            ".jsx": "jsx",
-            ".tsx": "tsx",
-            ".md": "markdown",
-            ".json": "json",
-            ".sh": "bash",
-            ".sql": "sql",
-            ".c": "c",
-            ".h": "c",
-            ".html": "html",
-            ".css": "css",
-        }[suffix]
+        # `splitext` finds the same extension as `Path.suffix`, without building a `Path`
+        return _LANG_BY_SUFFIX.get(os.path.splitext(path)[1].lower(), "text")
 
     def print_welcome(self, title: str, lines: list[str]) -> None:
         body = "\n".join(lines)
@@ -270,288 +384,318 @@ class TUI:
     ) -> None:
         """Display the result of the tool call after it's completiong along with some information
         about the tool call (metadata)."""
+        self.flush_assistant_delta()
         border_style = f"tool.{tool_kind}" if tool_kind else "tool"
-        status_icon = "✅" if success else "❌"
         status_style = "success" if success else "error"
 
-        title = Text.assemble(
-            (status_icon, status_style),
-            (name, "tool"),
-            ("  ", "muted"),
-            (f"#{call_id[:8]}", "muted"),
+        title = _tool_title(_SUCCESS_ICON if success else _FAILURE_ICON, name, call_id)
+
+        # Get the arguments for this tool call id. The call is done, so they are dropped, such that
+        # they do not pile up over a long session
+        args = self._tool_args_by_call_id.pop(call_id, {})
+        resolved_paths = self._resolved_paths_by_call_id.pop(call_id, {})
+        if not isinstance(metadata, dict):
+            metadata = {}
+
+        # Successful results are rendered by the handler of their tool, found with a single
+        # lookup. A handler returns `None` when it cannot render the result, in which case (as for
+        # failed results and tools without a handler) the plain output is rendered
+        handler = _COMPLETE_HANDLERS.get(name) if success else None
+        blocks = (
+            handler(self, args, output, metadata, diff, exit_code, resolved_paths)
+            if handler
+            else None
+        )
+        if blocks is None:
+            blocks = self._render_default(output, error, success)
+
+        if truncated:
+            blocks.append(Text("note: tool output was truncated", style="warning"))
+
+        # Group all blocks into a panel
+        panel = Panel(
+            Group(*blocks),
+            title=title,
+            title_align="left",
+            subtitle=Text("done" if success else "failed", style=status_style),
+            subtitle_align="right",
+            box=box.ROUNDED,
+            border_style=border_style,
+            padding=(1, 2),
         )
 
-        # Get the arguments for this tool call id
-        args = self._tool_args_by_call_id.get(call_id, {})
+        self.console.print()
+        self.console.print(panel)
 
-        primary_path = None
+    def _trunc(self, text: str) -> str:
+        """Truncate `text` to the token budget of a displayed block. The result is remembered, such
+        that rendering the same text again (e.g. when a handler falls back to the default
+        rendering) does not tokenize it again."""
+        last = self._last_truncated
+        if last is not None and last[0] is text:
+            return last[1]
 
-        # Keeps track of the blocks to be rendered
-        blocks = []
-        if isinstance(metadata, dict) and isinstance(metadata.get("path"), str):
-            primary_path = metadata.get("path")
-
-        if name == "read_file" and success:
-            if primary_path:
-                start_line, code = self._extract_read_file_code(output)
-
-                # Get the display parameters from the `metadata` field emitted by the read_file tool.
-                shown_start = metadata.get("shown_start")
-                shown_end = metadata.get("shown_end")
-                total_lines = metadata.get("total_lines")
-                prog_lang = self._guess_language(primary_path)
-
-                # Construct the header with the path of the file
-                header_parts = [str(resolve_path(self.cwd, primary_path))]
-                header_parts.append(" 🔵 ")
-
-                # Information about the lines shown
-                if shown_start and shown_end and total_lines:
-                    header_parts.append(
-                        f"lines {shown_start}-{shown_end} of {total_lines} lines"
-                    )
-                header = "".join(header_parts)
-                blocks.append(header)
-                blocks.append(
-                    Syntax(
-                        code,
-                        prog_lang,
-                        theme="vim",
-                        line_numbers=True,
-                        start_line=start_line,
-                        word_wrap=False,
-                    )
-                )
-            else:
-                output_display = truncate_text(
-                    output,
-                    "",
-                    self._max_block_tokens,
-                )
-                blocks.append(
-                    Syntax(
-                        output_display,
-                        "text",
-                        theme="vim",
-                        word_wrap=False,
-                    )
-                )
-        elif name in {"write_file", "edit"} and success and diff:
-            output_line = output.strip() if output else "Completed"
-            blocks.append(Text(output_line, style="muted"))
-            diff_text = diff
-            diff_display = truncate_text(
-                diff_text, self.config.model_name, self._max_block_tokens
-            )
-            blocks.append(Syntax(diff_display, "diff", theme="vim", word_wrap=True))
+        truncated = truncate_text(text, self.config.model_name, self._max_block_tokens)
+        self._last_truncated = (text, truncated)
+        return truncated
 
-        elif name == "shell" and success:
-            command = args.get("command")
-            if isinstance(command, str) and command.strip():
-                blocks.append(Text(f"$ {command.strip()}", style="muted"))
+    def _append_summary(self, blocks: list, summary: list[str], output: str) -> list:
+        """Append the muted one line `summary` of a tool result, if any, followed by its truncated
+        `output` to `blocks`, which is the layout most tools are displayed with"""
+        if summary:
+            blocks.append(Text(" 🔵 ".join(summary), style="muted"))
 
-            if exit_code is not None:
-                blocks.append(Text(f"exit_code={exit_code}", style="muted"))
+        blocks.append(_syntax(self._trunc(output), "text"))
+        return blocks
 
-            output_display = truncate_text(
-                output, self.config.model_name, self._max_block_tokens
-            )
-            blocks.append(
-                Syntax(
-                    output_display,
+    def _render_read_file(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        primary_path = metadata.get("path")
+        if not isinstance(primary_path, str) or not primary_path:
+            return [
+                _syntax(
+                    truncate_text(output, "", self._max_block_tokens),
                     "text",
-                    theme="vim",
-                    word_wrap=True,
+                    word_wrap=False,
                 )
-            )
+            ]
 
-        elif name == "list_dir" and success:
-            entries = metadata.get("entries")
-            path = metadata.get("path")
-            summary = []
+        extracted = self._extract_read_file_code(output)
+        if extracted is None:
+            return None
+        start_line, code = extracted
 
-            if isinstance(path, str):
-                summary.append(path)
+        # Get the display parameters from the `metadata` field emitted by the read_file tool.
+        shown_start = metadata.get("shown_start")
+        shown_end = metadata.get("shown_end")
+        total_lines = metadata.get("total_lines")
+        prog_lang = self._guess_language(primary_path)
 
-            if isinstance(entries, int):
-                summary.append(f"{entries} entries")
+        # Construct the header with the path of the file
+        resolved_path = resolved_paths.get("path") or str(
+            resolve_path(self.cwd, primary_path)
+        )
+        # followed by information about the lines shown, if any
+        header = (
+            f"{resolved_path} 🔵 lines {shown_start}-{shown_end} of {total_lines} lines"
+            if shown_start and shown_end and total_lines
+            else resolved_path
+        )
+        # Only highlight about two screens of code, which is all that stays visible, instead of
+        # lexing the whole read. The end of the last kept line is found by jumping between newlines
+        max_rows = self.console.size.height * 2
+        end = -1
+        for _ in range(max_rows):
+            end = code.find("\n", end + 1)
+            if end < 0:
+                break
+        clipped = end >= 0
+        if clipped:
+            code = code[:end]
+
+        blocks = [
+            header,
+            _syntax(
+                code,
+                prog_lang,
+                line_numbers=True,
+                start_line=start_line,
+                word_wrap=False,
+            ),
+        ]
+        if clipped:
+            blocks.append(Text("… output truncated for display", style="muted"))
+        return blocks
 
-            if summary:
-                blocks.append(Text(" 🔵 ".join(summary), style="muted"))
+    def _render_file_diff(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        if not diff:
+            return None
 
-            output_display = truncate_text(
-                output, self.config.model_name, self._max_block_tokens
-            )
-            blocks.append(
-                Syntax(
-                    output_display,
-                    "text",
-                    theme="vim",
-                    word_wrap=True,
-                )
-            )
-        
-        elif name == 'grep' and success:
-            matches = metadata.get('matches')
-            files_searched = metadata.get("files_searched")
-            summary = []
-            
-            if isinstance(matches, int):
-                summary.append(f"{matches} matches")
-            if isinstance(files_searched, int):
-                summary.append(f"searched {files_searched} files")
-                
-            if summary:
-                blocks.append(Text(" 🔵 ".join(summary), style='muted'))
-                
-            output_display = truncate_text(output, self.config.model_name, self._max_block_tokens)
-            blocks.append(
-                Syntax(
-                    output_display,
-                    "text",
-                    theme="vim",
-                    word_wrap=True,
-                )
-            )
-        
-        elif name == 'glob' and success:
-            matches = metadata.get('matches')
-            
-            if isinstance(matches, int):
-                blocks.append(Text(f"{matches} matches", style='muted'))
-                
-            output_display = truncate_text(output, self.config.model_name, self._max_block_tokens)
-            blocks.append(
-                Syntax(
-                    output_display,
-                    "text",
-                    theme="vim",
-                    word_wrap=True,
-                )
-            )
+        output_line = output.strip() if output else "Completed"
+        diff_display = self._trunc(diff)
+        return [
+            Text(output_line, style="muted"),
+            _syntax(diff_display, "diff"),
+        ]
 
-        elif name == 'web_search' and success:
-            results = metadata.get('results')
-            query = args.get("query")
-            summary = []
-            
-            if isinstance(query, str):
-                summary.append(query)
-            
-            if isinstance(results, int):
-                summary.append(f"{results} results")
-                
-            if summary:
-                blocks.append(Text(" 🔵 ".join(summary), style="muted"))
-    
-            output_display = truncate_text(output, self.config.model_name, self._max_block_tokens)
-            blocks.append(
-                Syntax(
-                    output_display,
-                    "text",
-                    theme="vim",
-                    word_wrap=True,
-                )
-            )
+    def _render_shell(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        blocks = []
+        command = args.get("command")
+        if isinstance(command, str) and command.strip():
+            blocks.append(Text(f"$ {command.strip()}", style="muted"))
 
-        elif name == 'web_fetch' and success:
-            status_code = metadata.get('status_code')
-            content_length = metadata.get("content_length")
-            url = args.get("url")
-            summary = []
-            
-            if isinstance(status_code, int):
-                summary.append(f"{status_code}")
-            
-            if isinstance(content_length, int):
-                summary.append(f"{content_length} bytes")
-
-            if isinstance(url, str):
-                summary.append(url)
-                
-            if summary:
-                blocks.append(Text(" 🔵 ".join(summary), style="muted"))
-    
-            output_display = truncate_text(output, self.config.model_name, self._max_block_tokens)
-            blocks.append(
-                Syntax(
-                    output_display,
-                    "text",
-                    theme="vim",
-                    word_wrap=True,
-                )
-            )
+        if exit_code is not None:
+            blocks.append(Text(f"exit_code={exit_code}", style="muted"))
 
-        elif name == "todos" and success:
-            # TODO: There is no persistent state for todos
-            output_display = truncate_text(output, self.config.model_name, self._max_block_tokens)
-            blocks.append(
-                Syntax(
-                    output_display,
-                    "text",
-                    theme="vim",
-                    word_wrap=True,
-                )
-            )
-            
-        elif name == "memory" and success:
-            action = args.get('action')
-            key = args.get('key')
-            found = metadata.get('found')
-            summary = []
-            
-            if isinstance(action, str) and action:
-                summary.append(action)
-            if isinstance(key, str) and key:
-                summary.append(key)
-            if isinstance(found, bool):
-                summary.append("found" if found else "missing")
-                
-            if summary:
-                blocks.append(Text(" 🔵 ".join(summary), style="muted"))
-                
-            output_display = truncate_text(output, self.config.model_name, self._max_block_tokens)
-            blocks.append(
-                Syntax(
-                    output_display,
-                    "text",
-                    theme="vim",
-                    word_wrap=True,
-                )
-            ) 
+        return self._append_summary(blocks, [], output)
 
-        else:
-            if error and not success:
-                blocks.append(Text(error, style='error'))
-            
-            output_display = truncate_text(output, self.config.model_name, self._max_block_tokens)
-            if output_display.strip():
-                blocks.append(Syntax(
-                    output_display,
-                    "text",
-                    theme="vim",
-                    word_wrap=True,
-                ))
-            else:
-                blocks.append(Text("(no output)", style="muted"))
+    def _render_list_dir(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        entries = metadata.get("entries")
+        path = metadata.get("path")
+        summary = []
 
-        if truncated:
-            blocks.append(Text("note: tool output was truncated", style="warning"))
+        if isinstance(path, str):
+            summary.append(path)
 
-        # Group all blocks into a panel
-        panel = Panel(
-            Group(*blocks),
-            title=title,
-            title_align="left",
-            subtitle=Text("done" if success else "failed", style=status_style),
-            subtitle_align="right",
-            box=box.ROUNDED,
-            border_style=border_style,
-            padding=(1, 2),
-        )
+        if isinstance(entries, int):
+            summary.append(f"{entries} entries")
 
-        self.console.print()
-        self.console.print(panel)
+        return self._append_summary([], summary, output)
+
+    def _render_grep(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        matches = metadata.get('matches')
+        files_searched = metadata.get("files_searched")
+        summary = []
+
+        if isinstance(matches, int):
+            summary.append(f"{matches} matches")
+        if isinstance(files_searched, int):
+            summary.append(f"searched {files_searched} files")
+
+        return self._append_summary([], summary, output)
+
+    def _render_glob(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        matches = metadata.get('matches')
+        summary = [f"{matches} matches"] if isinstance(matches, int) else []
+        return self._append_summary([], summary, output)
+
+    def _render_web_search(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        results = metadata.get('results')
+        query = args.get("query")
+        summary = []
+
+        if isinstance(query, str):
+            summary.append(query)
+
+        if isinstance(results, int):
+            summary.append(f"{results} results")
+
+        return self._append_summary([], summary, output)
+
+    def _render_web_fetch(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        status_code = metadata.get('status_code')
+        content_length = metadata.get("content_length")
+        url = args.get("url")
+        summary = []
+
+        if isinstance(status_code, int):
+            summary.append(f"{status_code}")
+
+        if isinstance(content_length, int):
+            summary.append(f"{content_length} bytes")
+
+        if isinstance(url, str):
+            summary.append(url)
+
+        return self._append_summary([], summary, output)
+
+    def _render_todos(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        # TODO: There is no persistent state for todos
+        return self._append_summary([], [], output)
+
+    def _render_memory(
+        self,
+        args: dict[str, Any],
+        output: str,
+        metadata: dict[str, Any],
+        diff: str | None,
+        exit_code: int | None,
+        resolved_paths: dict[str, str],
+    ) -> list | None:
+        action = args.get('action')
+        key = args.get('key')
+        found = metadata.get('found')
+        summary = []
+
+        if isinstance(action, str) and action:
+            summary.append(action)
+        if isinstance(key, str) and key:
+            summary.append(key)
+        if isinstance(found, bool):
+            summary.append("found" if found else "missing")
+
+        return self._append_summary([], summary, output)
+
+    def _render_default(self, output: str, error: str | None, success: bool) -> list:
+        blocks = []
+        if error and not success:
+            blocks.append(Text(error, style='error'))
+
+        output_display = self._trunc(output)
+        blocks.append(_syntax(output_display, "text"))
+
+        return blocks
 
     def handle_confirmation(self, confirmation: ToolConfirmation) -> bool:
         output = [
@@ -564,12 +708,7 @@ class TUI:
             
         if confirmation.diff:
             diff_text = confirmation.diff.create_diff()
-            output.append(Syntax(
-                diff_text,
-                'diff',
-                theme="monokai",
-                word_wrap=True,
-            ))
+            output.append(_syntax(diff_text, "diff", theme="monokai"))
             
         self.console.print()
         self.console.print(
@@ -617,4 +756,20 @@ class TUI:
 - The agent can read, write, and execute code
 - Some operations require approval (can be configured)
 """
-        self.console.print(Markdown(help_text))
\ No newline at end of file
+        self.console.print(Markdown(help_text))
+
+
+# Renderers of the successful results of each tool, see `TUI.tool_call_complete`
+_COMPLETE_HANDLERS: dict[str, Callable[..., list | None]] = {
+    "read_file": TUI._render_read_file,
+    "write_file": TUI._render_file_diff,
+    "edit": TUI._render_file_diff,
+    "shell": TUI._render_shell,
+    "list_dir": TUI._render_list_dir,
+    "grep": TUI._render_grep,
+    "glob": TUI._render_glob,
+    "web_search": TUI._render_web_search,
+    "web_fetch": TUI._render_web_fetch,
+    "todos": TUI._render_todos,
+    "memory": TUI._render_memory,
+}
@@ -1,12 +1,25 @@
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import os
 from pathlib import Path
+import stat
+import tempfile
 
+# The same few paths get resolved over and over during a session (the model keeps reading and
+# editing the same files), and resolving a path walks its symlinks on the filesystem. A symlink
+# changed during the session is only seen once its entry is evicted.
+@functools.lru_cache(maxsize=512)
 def resolve_path(base: str | Path, path: str | Path):
-    path = Path(path)
+    # Most callers already pass paths, which need no wrapping
+    if not isinstance(path, Path):
+        path = Path(path)
     if path.is_absolute():
         return path.resolve()
-    
+
+    if not isinstance(base, Path):
+        base = Path(base)
     # Susceptible to evasion with ../..
-    return Path(base).resolve() / path
+    return base.resolve() / path
 
 def ensure_parent_directory(path: str | Path) -> Path:
     path = Path(path)
@@ -14,11 +27,80 @@ def ensure_parent_directory(path: str | Path) -> Path:
     
     return path
 
+def write_text_atomic(path: str | Path, content: str, encoding: str = "utf-8") -> None:
+    """Write `content` to a temporary file next to `path` and rename it over `path`, such that a
+    crash in the middle of the write never leaves a partially written file behind"""
+    # Write through symlinks instead of replacing them with a regular file
+    target = Path(os.path.realpath(path))
+    data = content.encode(encoding)
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=target.parent, prefix=f".{target.name}.", suffix=".magnet-tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        # Keep the permissions of the file we are replacing
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(target).st_mode))
+        except FileNotFoundError:
+            pass
+
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+# Number of bytes at the start of a file which are sniffed to decide if the file is binary
+BINARY_SNIFF_SIZE = 8192
+
+def is_binary_prefix(chunk: bytes) -> bool:
+    """Basic heuristic to check if the first bytes of a file belong to a binary file. Text files
+    never contain NUL bytes, whatever their encoding is."""
+    return chunk.find(b"\x00") != -1
+
+# Number of bytes `is_binary_file` reads from disk. Binary files almost always show a NUL byte in
+# their first page, and the tools probing files this way (grep, glob) probe a lot of them
+_PROBE_SIZE = 4096
+# Do not block opening a FIFO met while searching a directory, nor leak the descriptor to a child
+# process (both flags are missing on Windows)
+_PROBE_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_NONBLOCK", 0) | getattr(os, "O_CLOEXEC", 0)
+
 def is_binary_file(path: str | Path) -> bool:
     """Basic heuristic to check for binary file"""
+    # A raw file descriptor is enough to read a single chunk, without the buffered file object
+    # `open` wraps it in. This adds up when searching through many files.
+    try:
+        fd = os.open(path, _PROBE_OPEN_FLAGS)
+    except OSError:
+        return False
+
     try:
-        with open(path, "rb") as f:
-            chunk = f.read(8192)
-            return 0x00 in chunk
-    except (OSError, IOError):
-        return False
\ No newline at end of file
+        return is_binary_prefix(os.read(fd, _PROBE_SIZE))
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+# Batches of files smaller than this are probed on the calling thread, since handing them to the
+# thread pool costs more than probing them
+_PROBE_BATCH_MIN = 16
+# Thread pool probing the larger batches of files, created on first use
+_probe_executor: ThreadPoolExecutor | None = None
+
+def is_binary_files(paths: list[str | Path]) -> list[bool]:
+    """Check each of `paths` with `is_binary_file`. The files of larger batches are probed
+    concurrently on a thread pool, such that their open/read/close system calls (which release
+    the GIL) overlap instead of waiting for one another."""
+    if len(paths) < _PROBE_BATCH_MIN:
+        return [is_binary_file(path) for path in paths]
+
+    global _probe_executor
+    if _probe_executor is None:
+        _probe_executor = ThreadPoolExecutor(thread_name_prefix="binary-probe")
+
+    return list(_probe_executor.map(is_binary_file, paths))
@@ -0,0 +1,57 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+from typing import Any
+
+
+def new_process_group_kwargs() -> dict[str, Any]:
+    """Keyword arguments for starting a subprocess in its own process group, such that the
+    whole group (the process and its children) can be terminated at once"""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+    # Create a new OS session and process group
+    return {"start_new_session": True}
+
+
+def _signal_process_group(process: asyncio.subprocess.Process, force: bool) -> None:
+    if sys.platform == "win32":
+        if force:
+            process.kill()
+        else:
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+    else:
+        os.killpg(os.getpgid(process.pid), signal.SIGKILL if force else signal.SIGTERM)
+
+
+async def kill_process_group(process: asyncio.subprocess.Process, grace: float = 2.0) -> None:
+    """Terminate the process group of `process`, giving it `grace` seconds to exit after a
+    SIGTERM (CTRL_BREAK on Windows) before force killing it"""
+    try:
+        _signal_process_group(process, force=False)
+    except ProcessLookupError:
+        # The process already exited
+        return
+
+    try:
+        await asyncio.wait_for(process.wait(), timeout=grace)
+        return
+    except asyncio.TimeoutError:
+        pass
+
+    try:
+        _signal_process_group(process, force=True)
+    except ProcessLookupError:
+        pass
+
+
+async def wait_process(process: asyncio.subprocess.Process, timeout: float = 1.0) -> None:
+    """Wait at most `timeout` seconds for `process` to exit, since waiting for a process that was
+    just killed can hang forever on some platforms, and close its standard input if it did not"""
+    try:
+        await asyncio.wait_for(process.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        if process.stdin and not process.stdin.is_closing():
+            process.stdin.close()
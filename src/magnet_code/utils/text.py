@@ -1,28 +1,90 @@
-import tiktoken
+from collections import OrderedDict
+import functools
+import hashlib
+import os
 
+# Token counts of recently counted texts, keyed by the digest of the text and the model, such
+# that counting the same output again (e.g. re-reading a file) does not tokenize it again
+_TOKEN_COUNT_CACHE: OrderedDict[tuple[bytes, str], int] = OrderedDict()
+_TOKEN_COUNT_CACHE_SIZE = 2048
+
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    # tiktoken loads its native extension and encoding registry when imported, which only the
+    # first tokenization has to pay for, instead of every import of this module
+    import tiktoken
 
-def get_tokenizer(model: str):
     try:
-        encoding = tiktoken.encoding_for_model(model)
-        return encoding.encode
+        return tiktoken.encoding_for_model(model)
     except Exception:
-        encoding = tiktoken.get_encoding("cl100k_base")
-        return encoding.encode
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def _cache_key(text: str, model: str) -> tuple[bytes, str]:
+    # Lone surrogates (e.g. from output decoded with `surrogateescape`) are valid to tokenize, so
+    # they must not fail the digest either
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest(), model
+
+
+def get_tokenizer(model: str):
+    return _get_encoding(model).encode
 
 
 def count_tokens(text: str, model: str) -> int:
-    tokenizer = get_tokenizer(model)
-    
-    if tokenizer:
-        if text is None:
-            return 0
-        return len(tokenizer(text))
-    else:
-        return estimate_tokens(text)
+    if text is None:
+        return 0
+
+    key = _cache_key(text, model)
+    count = _TOKEN_COUNT_CACHE.get(key)
+    if count is not None:
+        _TOKEN_COUNT_CACHE.move_to_end(key)
+        return count
+
+    # `get_tokenizer` is cached per model and always returns a tokenizer, falling back to the
+    # cl100k_base encoding for unknown models
+    count = len(get_tokenizer(model)(text))
+    _TOKEN_COUNT_CACHE[key] = count
+    if len(_TOKEN_COUNT_CACHE) > _TOKEN_COUNT_CACHE_SIZE:
+        _TOKEN_COUNT_CACHE.popitem(last=False)
+
+    return count
+
+
+def count_tokens_many(texts: list[str], model: str) -> list[int]:
+    """Count the tokens of each of `texts`. The texts which are not in the token count cache are
+    encoded in a single batch, which tiktoken spreads over multiple threads."""
+    keys = [_cache_key(text, model) for text in texts]
+    counts = [_TOKEN_COUNT_CACHE.get(key) for key in keys]
+
+    missing = [i for i, count in enumerate(counts) if count is None]
+    if missing:
+        # The same encoding as `count_tokens`, such that both store the same counts in the cache
+        encoded = _get_encoding(model).encode_batch(
+            [texts[i] for i in missing], num_threads=os.cpu_count() or 1
+        )
+        for i, tokens in zip(missing, encoded):
+            counts[i] = _TOKEN_COUNT_CACHE[keys[i]] = len(tokens)
+
+        while len(_TOKEN_COUNT_CACHE) > _TOKEN_COUNT_CACHE_SIZE:
+            _TOKEN_COUNT_CACHE.popitem(last=False)
+
+    return counts
+
+def count_lines(text: str) -> int:
+    """Count the lines in `text` with a single count of the newlines, instead of splitting it into
+    a list of lines. A last line without a trailing newline is counted too."""
+    return text.count("\n") + (bool(text) and not text.endswith("\n"))
 
 
 def estimate_tokens(text: str) -> int:
-    return max(1, len(text) // 4)
+    """Estimate the tokens of `text` without tokenizing it. Ascii text is estimated at ~4
+    characters per token, which is only a rough guess. Other text is estimated from its utf-8
+    length, which is an upper bound (a token is never shorter than a byte), since one non-ascii
+    character is often a token or more."""
+    if text.isascii():
+        return (len(text) >> 2) or 1
+    return len(text.encode("utf-8", "surrogatepass")) or 1
 
 
 def truncate_text(
@@ -31,8 +93,11 @@ def truncate_text(
     max_tokens: int,
     suffix: str = "\n... [truncated]",
     preserve_lines: bool = True,
+    token_count: int | None = None,
 ):
-    current_tokens = count_tokens(text, model)
+    """Truncate `text` to at most `max_tokens` tokens. Callers which already counted the tokens of
+    `text` can pass the count as `token_count` to not tokenize it again."""
+    current_tokens = token_count if token_count is not None else count_tokens(text, model)
     if current_tokens <= max_tokens:
         return text
 
@@ -0,0 +1,19 @@
+from magnet_code.tools.builtin.memory import _dumps, parse_memory
+
+
+def test_parse_memory_keeps_entries_key():
+    memory = {"entries": "user prefers tabs", "editor": "vim"}
+    assert parse_memory(_dumps(memory)) == memory
+
+
+def test_parse_memory_keeps_lone_entries_key():
+    memory = {"entries": "user prefers tabs"}
+    assert parse_memory(_dumps(memory)) == memory
+
+
+def test_parse_memory_migrates_legacy_format():
+    assert parse_memory(_dumps({"entries": {"editor": "vim"}})) == {"editor": "vim"}
+
+
+def test_parse_memory_rejects_non_mapping():
+    assert parse_memory(b"[1, 2]") == {}
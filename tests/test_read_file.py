@@ -0,0 +1,35 @@
+import asyncio
+
+from magnet_code.config.config import Config
+from magnet_code.tools.base import ToolInvocation
+from magnet_code.tools.builtin.read_file import ReadFileTool
+
+
+def _read(path):
+    tool = ReadFileTool(Config(cwd=path.parent))
+    invocation = ToolInvocation(parameters={"path": str(path)}, cwd=path.parent)
+    return asyncio.run(tool.execute(invocation))
+
+
+def test_read_file_truncates_non_ascii_output(tmp_path):
+    # About 12k tokens by the ~4 characters per token estimate, but several times the limit in
+    # real tokens, since each of these characters is at least one token
+    path = tmp_path / "cjk.txt"
+    path.write_text("\n".join("漢字仮名交じり文" * 5 for _ in range(1000)), encoding="utf-8")
+
+    result = _read(path)
+
+    assert result.success
+    assert result.truncated
+    assert "[truncated 1000 total lines]" in result.output
+
+
+def test_read_file_keeps_small_ascii_output(tmp_path):
+    path = tmp_path / "small.py"
+    path.write_text("print('hello')\n", encoding="utf-8")
+
+    result = _read(path)
+
+    assert result.success
+    assert not result.truncated
+    assert result.output == "     1|print('hello')"